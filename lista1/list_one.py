@@ -1,22 +1,63 @@
 import argparse
 import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+CHUNK_SIZE = 1 << 24
+
+def count_codes(f, chunk_size=CHUNK_SIZE):
+    codes_count = np.zeros(256, dtype=np.int64)
+    codes_follow = np.zeros(256 * 256, dtype=np.int64)
+
+    # the first byte is counted as following 0x00
+    prev = 0
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            break
+
+        cur = np.frombuffer(chunk, dtype=np.uint8)
+        codes_count += np.bincount(cur, minlength=256)
+
+        pairs = np.empty(len(cur), dtype=np.uint16)
+        pairs[0] = prev * 256 + int(cur[0])
+        pairs[1:] = cur[:-1].astype(np.uint16) * 256 + cur[1:]
+        codes_follow += np.bincount(pairs, minlength=256 * 256)
+
+        prev = int(cur[-1])
+
+    return codes_count, codes_follow.reshape(256, 256)
 
 def calc_probability(codes_count):
+    if isinstance(codes_count, np.ndarray):
+        return codes_count / codes_count.sum()
     total = sum(codes_count.values())
     bytes_prob = {byte: count / total for byte, count in codes_count.items()}
     return bytes_prob
 
 def calc_information(bytes_prob):
+    if isinstance(bytes_prob, np.ndarray):
+        bytes_info = np.zeros_like(bytes_prob)
+        np.negative(np.log2(bytes_prob, where=bytes_prob > 0, out=bytes_info), out=bytes_info)
+        return bytes_info
     bytes_info = {byte: -math.log2(prob) for byte, prob in bytes_prob.items()}
     return bytes_info
 
 def calc_entropy(bytes_prob, bytes_info):
+    if isinstance(bytes_prob, np.ndarray):
+        return float(np.sum(bytes_prob * bytes_info))
     entropy = 0.0
     for byte in bytes_prob:
         entropy += bytes_prob[byte] * bytes_info[byte]
     return entropy
 
 def calc_conditional_entropy(codes_follow, probs):
+    if isinstance(codes_follow, np.ndarray):
+        totals = codes_follow.sum(axis=1, keepdims=True)
+        probs_y_x = np.divide(codes_follow, totals, out=np.zeros(codes_follow.shape), where=totals > 0)
+        partial_entropy = np.sum(probs_y_x * calc_information(probs_y_x), axis=1)
+        return float(np.dot(probs, partial_entropy))
     cond_entropy = 0.0
     for prev_byte, follow_dict in codes_follow.items():
         partial_entropy = 0.0
@@ -28,52 +69,239 @@ def calc_conditional_entropy(codes_follow, probs):
         cond_entropy += probs.get(prev_byte, 0) * partial_entropy
     return cond_entropy
 
+def sorted_counts(counts):
+    symbols = np.flatnonzero(counts)
+    order = np.argsort(-counts[symbols], kind='stable')
+    return symbols[order]
 
-if __name__ == "__main__":
-    
-    parser = argparse.ArgumentParser()
-    parser.add_argument("path", help="Path to the file")
-    args = parser.parse_args()
+def calc_counts_entropy(counts):
+    counts = counts[counts > 0].astype(np.float64)
+    total = counts.sum()
+    if total == 0:
+        return 0.0
+    return float(np.log2(total) - np.sum(counts * np.log2(counts)) / total)
+
+
+MARKOV_CHUNK_SIZE = 1 << 22
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+HASH_MIXER = np.uint64(0xBF58476D1CE4E5B9)
+
+class MarkovEntropy:
+    # n-gram counts for n = 1..order+1. Short n-grams are counted exactly,
+    # longer ones go to a fixed-size hashed table, so memory does not depend
+    # on the input size.
+    def __init__(self, order, table_bits=20):
+        if not 0 <= order <= 8:
+            raise ValueError("Order must be between 0 and 8")
+        self.order = order
+        self.table_bits = table_bits
+        self.tables = []
+        for n in range(1, order + 2):
+            bits = 8 * n if 8 * n <= table_bits else table_bits
+            self.tables.append(np.zeros(1 << bits, dtype=np.int64))
+        self.tail = np.zeros(order, dtype=np.uint8)
+        self.seen = 0
+
+    def update(self, chunk):
+        cur = np.frombuffer(chunk, dtype=np.uint8)
+        if len(cur) == 0:
+            return
+
+        k = self.order
+        buf = np.concatenate((self.tail, cur)).astype(np.uint64)
+        packed = np.zeros(len(cur), dtype=np.uint64)
+        hashed = np.zeros(len(cur), dtype=np.uint64)
+        shift = np.uint64(64 - self.table_bits)
+
+        for n, table in enumerate(self.tables, start=1):
+            byte = buf[k - n + 1:len(buf) - n + 1]
+            hashed = hashed * HASH_MULTIPLIER + byte + np.uint64(1)
+            if len(table) == 1 << (8 * n):
+                packed |= byte << np.uint64(8 * (n - 1))
+                index = packed
+            else:
+                index = (hashed * HASH_MIXER) >> shift
+
+            # n-grams at the very start of the stream have no full context yet
+            skip = max(0, n - 1 - self.seen)
+            table += np.bincount(index[skip:].astype(np.intp), minlength=len(table))
+
+        self.seen += len(cur)
+        if k:
+            self.tail = buf[-k:].astype(np.uint8)
 
-    codes_count = {}
-    codes_follow = {}
+    def entropies(self):
+        # H_j = H(X_1..X_j+1) - H(X_1..X_j)
+        joint = [0.0] + [calc_counts_entropy(table) for table in self.tables]
+        return [max(0.0, joint[n + 1] - joint[n]) for n in range(self.order + 1)]
 
-    with open(args.path, 'rb') as f:
-        prev = b'\x00'
-        for byte in iter(lambda: f.read(1), b''):
-            if byte not in codes_count:
-                codes_count[byte] = 0
-            codes_count[byte] += 1
+def calc_markov_entropies(f, order, table_bits=20, chunk_size=MARKOV_CHUNK_SIZE):
+    estimator = MarkovEntropy(order, table_bits)
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        estimator.update(chunk)
+    return estimator.entropies()
 
-            if prev not in codes_follow:
-                codes_follow[prev] = {}
+def count_file(path):
+    with open(path, 'rb') as f:
+        return count_codes(f)
 
-            if byte not in codes_follow[prev]:
-                codes_follow[prev][byte] = 0
-            codes_follow[prev][byte] += 1
+def calc_file_entropies(codes_count, codes_follow):
+    if codes_count.sum() == 0:
+        return 0.0, 0.0
+    probs = calc_probability(codes_count)
+    entropy = calc_entropy(probs, calc_information(probs))
+    return entropy, calc_conditional_entropy(codes_follow, probs)
 
-            prev = byte
+def collect_paths(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    yield os.path.join(root, name)
+        else:
+            yield path
 
-    output_file = "output.txt"
+def new_corpus_stats():
+    return {
+        'codes_count': np.zeros(256, dtype=np.int64),
+        'codes_follow': np.zeros((256, 256), dtype=np.int64),
+        'files': {},
+        'stamps': {},
+    }
 
+def file_stamp(path):
+    # None for a file that no longer exists
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_size, st.st_mtime_ns
 
-    with open(output_file, "w") as f:
-        f.write("Byte Frequencies:\n")
-        for byte, count in sorted(codes_count.items(), key=lambda item: item[1], reverse=True):
-            f.write(f"Byte: {byte.hex()} Count: {count}\n")
+def analyze_corpus(paths, stats=None, max_workers=None):
+    # counts are additive, so files already present in stats with the same size
+    # and mtime are skipped; a changed or deleted file cannot be subtracted from
+    # the totals, so then the totals are rebuilt from every recorded file that
+    # still exists and deleted files are dropped from stats
+    if stats is None:
+        stats = new_corpus_stats()
+    new_paths = dict.fromkeys(os.path.abspath(path) for path in collect_paths(paths))
+    stamps = {path: file_stamp(path) for path in stats['files']}
+    if any(stats['stamps'].get(path) != stamp for path, stamp in stamps.items()):
+        new_paths = dict.fromkeys(path for path, stamp in stamps.items() if stamp is not None) | new_paths
+        stats = new_corpus_stats()
+    new_paths = [path for path in new_paths if path not in stats['files']]
+    stamps = [file_stamp(path) for path in new_paths]
 
-        f.write("\nByte Following Frequencies:\n")
-        for prev_byte, follow_dict in codes_follow.items():
-            f.write(f"\nAfter byte {prev_byte.hex()}:\n")
-            for byte, count in sorted(follow_dict.items(), key=lambda item: item[1], reverse=True):
-                f.write(f"    Byte: {byte.hex()} Count: {count}\n")
+    with ProcessPoolExecutor(max_workers) as pool:
+        for path, stamp, (codes_count, codes_follow) in zip(new_paths, stamps, pool.map(count_file, new_paths)):
+            stats['codes_count'] += codes_count
+            stats['codes_follow'] += codes_follow
+            stats['files'][path] = calc_file_entropies(codes_count, codes_follow)
+            stats['stamps'][path] = stamp
+    return stats
 
-    print(f"Analysis complete. Results written to {output_file}")
+def save_corpus_stats(path, stats):
+    with open(path, 'wb') as f:
+        np.savez(
+            f,
+            codes_count=stats['codes_count'],
+            codes_follow=stats['codes_follow'],
+            files=np.array(list(stats['files']), dtype=str),
+            entropies=np.array(list(stats['files'].values()), dtype=np.float64).reshape(-1, 2),
+            stamps=np.array([stats['stamps'][path] for path in stats['files']], dtype=np.int64).reshape(-1, 2),
+        )
 
-    bytes_prob = calc_probability(codes_count)
-    bytes_info = calc_information(bytes_prob)
-    entropy = calc_entropy(bytes_prob, bytes_info)
-    cond_entropy = calc_conditional_entropy(codes_follow, bytes_prob)
+def load_corpus_stats(path):
+    with np.load(path) as data:
+        return {
+            'codes_count': data['codes_count'],
+            'codes_follow': data['codes_follow'],
+            'files': {str(name): tuple(map(float, e)) for name, e in zip(data['files'], data['entropies'])},
+            # files saved without stamps are counted again on the next run
+            'stamps': {str(name): tuple(map(int, s)) for name, s in zip(data['files'], data['stamps'])}
+                      if 'stamps' in data else {},
+        }
+
+def save_report(path, codes_count, codes_follow):
+    entropy, cond_entropy = calc_file_entropies(codes_count, codes_follow)
+    with open(path, 'wb') as f:
+        np.savez(
+            f,
+            codes_count=codes_count,
+            codes_follow=codes_follow,
+            entropy=entropy,
+            cond_entropy=cond_entropy,
+        )
+    return entropy, cond_entropy
+
+def load_report(path):
+    # arrays are read from the archive only when accessed
+    return np.load(path)
+
+def render_report(report, f):
+    codes_count = report['codes_count']
+    codes_follow = report['codes_follow']
+
+    f.write("Byte Frequencies:\n")
+    for byte in sorted_counts(codes_count):
+        f.write(f"Byte: {byte:02x} Count: {codes_count[byte]}\n")
+
+    f.write("\nByte Following Frequencies:\n")
+    for prev_byte in np.flatnonzero(codes_follow.sum(axis=1)):
+        f.write(f"\nAfter byte {prev_byte:02x}:\n")
+        follow = codes_follow[prev_byte]
+        for byte in sorted_counts(follow):
+            f.write(f"    Byte: {byte:02x} Count: {follow[byte]}\n")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("path", nargs="+", help="Path to the file (several files or directories enable corpus mode)")
+    parser.add_argument("--order", type=int, help="Also report H_0..H_k of a k-th order Markov model (single file only)")
+    parser.add_argument("--stats", help="Corpus statistics file (.npz) to extend with new files")
+    parser.add_argument("--workers", type=int, help="Number of worker processes in corpus mode")
+    parser.add_argument("--output", default="output.npz", help="Binary report file (default: output.npz)")
+    parser.add_argument("--text", help="Also render the report as text to this file")
+    args = parser.parse_args()
+
+    corpus_mode = len(args.path) > 1 or os.path.isdir(args.path[0]) or args.stats is not None
+    if corpus_mode and args.order is not None:
+        parser.error("--order works only for a single file, not in corpus mode")
+
+    if corpus_mode:
+        stats = None
+        if args.stats is not None and os.path.exists(args.stats):
+            stats = load_corpus_stats(args.stats)
+        stats = analyze_corpus(args.path, stats, args.workers)
+        if args.stats is not None:
+            save_corpus_stats(args.stats, stats)
+
+        for path, (entropy, cond_entropy) in stats['files'].items():
+            print(f"{path}: Entropy: {entropy:.4f} Conditional Entropy: {cond_entropy:.4f}")
+        codes_count, codes_follow = stats['codes_count'], stats['codes_follow']
+    else:
+        with open(args.path[0], 'rb') as f:
+            codes_count, codes_follow = count_codes(f)
+
+    if codes_count.sum() == 0:
+        print("File is empty. Exiting.")
+        exit()
+
+    entropy, cond_entropy = save_report(args.output, codes_count, codes_follow)
+    print(f"Analysis complete. Results written to {args.output}")
+
+    if args.text is not None:
+        with load_report(args.output) as report, open(args.text, "w") as f:
+            render_report(report, f)
+        print(f"Text report written to {args.text}")
 
     print(f"Entropy: {entropy:.4f}")
-    print(f"Conditional Entropy: {cond_entropy:.4f}")
\ No newline at end of file
+    print(f"Conditional Entropy: {cond_entropy:.4f}")
+
+    if args.order is not None:
+        with open(args.path[0], 'rb') as f:
+            markov_entropies = calc_markov_entropies(f, args.order)
+        for k, h in enumerate(markov_entropies):
+            print(f"H_{k}: {h:.4f}")
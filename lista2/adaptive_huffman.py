@@ -0,0 +1,233 @@
+import argparse
+import io
+import sys
+import time
+
+from bitarray import bitarray
+
+from fileio import open_file
+
+EOF_SYMBOL = 256
+SYMBOL_BITS = 9
+MAX_NODES = 2 * (EOF_SYMBOL + 1) - 1
+CHUNK_SIZE = 1 << 16
+
+class AdaptiveHuffmanTree:
+    # FGK tree stored in flat arrays. A node's index is its FGK number, so
+    # weights never decrease with the index and the root is the last node.
+    def __init__(self):
+        self.weight = [0] * MAX_NODES
+        self.parent = [-1] * MAX_NODES
+        self.left = [-1] * MAX_NODES
+        self.right = [-1] * MAX_NODES
+        self.symbol = [-1] * MAX_NODES
+        self.leaf = [-1] * (EOF_SYMBOL + 1)
+        self.root = MAX_NODES - 1
+        self.nyt = self.root
+
+    def path(self, node):
+        bits = []
+        parent = self.parent
+        while node != self.root:
+            bits.append(self.right[parent[node]] == node)
+            node = parent[node]
+        bits.reverse()
+        return bits
+
+    def add_symbol(self, symbol):
+        # the NYT node gets the new leaf (right) and a new NYT (left) as children
+        old_nyt = self.nyt
+        leaf = old_nyt - 1
+        self.nyt = old_nyt - 2
+        self.left[old_nyt] = self.nyt
+        self.right[old_nyt] = leaf
+        self.parent[leaf] = old_nyt
+        self.parent[self.nyt] = old_nyt
+        self.symbol[leaf] = symbol
+        self.leaf[symbol] = leaf
+        return leaf
+
+    def swap(self, a, b):
+        symbol, left, right = self.symbol, self.left, self.right
+        symbol[a], symbol[b] = symbol[b], symbol[a]
+        left[a], left[b] = left[b], left[a]
+        right[a], right[b] = right[b], right[a]
+        for node in (a, b):
+            if symbol[node] >= 0:
+                self.leaf[symbol[node]] = node
+            elif left[node] >= 0:
+                self.parent[left[node]] = node
+                self.parent[right[node]] = node
+
+    def update(self, symbol):
+        node = self.leaf[symbol]
+        if node < 0:
+            node = self.add_symbol(symbol)
+
+        weight, parent = self.weight, self.parent
+        while node >= 0:
+            leader = node
+            while leader < self.root and weight[leader + 1] == weight[node]:
+                leader += 1
+            if leader != node and leader != parent[node]:
+                self.swap(node, leader)
+                node = leader
+            weight[node] += 1
+            node = parent[node]
+
+class AdaptiveHuffmanEncoder:
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.bits = bitarray()
+
+    def _encode_symbol(self, symbol):
+        tree = self.tree
+        node = tree.leaf[symbol]
+        if node >= 0:
+            self.bits.extend(tree.path(node))
+        else:
+            self.bits.extend(tree.path(tree.nyt))
+            self.bits.extend(format(symbol, f'0{SYMBOL_BITS}b'))
+        tree.update(symbol)
+
+    def _take_bytes(self):
+        n = len(self.bits) // 8 * 8
+        data = self.bits[:n].tobytes()
+        del self.bits[:n]
+        return data
+
+    def encode(self, data):
+        for byte in data:
+            self._encode_symbol(byte)
+        return self._take_bytes()
+
+    def flush(self):
+        tree = self.tree
+        self.bits.extend(tree.path(tree.nyt))
+        self.bits.extend(format(EOF_SYMBOL, f'0{SYMBOL_BITS}b'))
+        data = self.bits.tobytes()
+        self.bits = bitarray()
+        return data
+
+class AdaptiveHuffmanDecoder:
+    def __init__(self):
+        self.tree = AdaptiveHuffmanTree()
+        self.bits = bitarray()
+        self.finished = False
+
+    def decode(self, data):
+        self.bits.frombytes(data)
+        bits, tree = self.bits, self.tree
+        left, right, symbol = tree.left, tree.right, tree.symbol
+        decoded = bytearray()
+        pos = 0
+        n_bits = len(bits)
+
+        while not self.finished:
+            # a symbol cut off at the end of the buffer is decoded with the next chunk
+            start = pos
+            node = tree.root
+            while node != tree.nyt and symbol[node] < 0 and pos < n_bits:
+                node = right[node] if bits[pos] else left[node]
+                pos += 1
+
+            if node == tree.nyt:
+                if pos + SYMBOL_BITS > n_bits:
+                    pos = start
+                    break
+                value = int(bits[pos:pos + SYMBOL_BITS].to01(), 2)
+                pos += SYMBOL_BITS
+                if value == EOF_SYMBOL:
+                    self.finished = True
+                    break
+            elif symbol[node] >= 0:
+                value = symbol[node]
+            else:
+                pos = start
+                break
+
+            decoded.append(value)
+            tree.update(value)
+
+        del bits[:pos]
+        return bytes(decoded)
+
+def encode(data):
+    encoder = AdaptiveHuffmanEncoder()
+    return encoder.encode(data) + encoder.flush()
+
+def decode(data):
+    return AdaptiveHuffmanDecoder().decode(data)
+
+def encode_stream(src, dst, chunk_size=CHUNK_SIZE):
+    encoder = AdaptiveHuffmanEncoder()
+    with open_file(src, 'rb') as fin, open_file(dst, 'wb') as fout:
+        # read1 returns whatever a pipe or socket has ready instead of waiting for a full chunk
+        read = getattr(fin, 'read1', fin.read)
+        for chunk in iter(lambda: read(chunk_size), b''):
+            fout.write(encoder.encode(chunk))
+            fout.flush()
+        fout.write(encoder.flush())
+
+def decode_stream(src, dst, chunk_size=CHUNK_SIZE):
+    decoder = AdaptiveHuffmanDecoder()
+    with open_file(src, 'rb') as fin, open_file(dst, 'wb') as fout:
+        read = getattr(fin, 'read1', fin.read)
+        for chunk in iter(lambda: read(chunk_size), b''):
+            fout.write(decoder.decode(chunk))
+            if decoder.finished:
+                break
+    if not decoder.finished:
+        raise ValueError("Adaptive Huffman stream ended without EOF symbol")
+
+def benchmark(path):
+    from huffman_coder import encode_file
+    from huffman_decoder import decode_file
+
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    def measure(encode_fn, decode_fn):
+        compressed = io.BytesIO()
+        start = time.perf_counter()
+        encode_fn(io.BytesIO(data), compressed)
+        encode_time = time.perf_counter() - start
+
+        compressed.seek(0)
+        decoded = io.BytesIO()
+        start = time.perf_counter()
+        decode_fn(compressed, decoded)
+        decode_time = time.perf_counter() - start
+
+        if decoded.getvalue() != data:
+            raise ValueError("Round trip failed")
+        return len(compressed.getvalue()), encode_time, decode_time
+
+    size_mb = len(data) / 1e6
+    for name, encode_fn, decode_fn in (
+        ("static", encode_file, decode_file),
+        ("adaptive", encode_stream, decode_stream),
+    ):
+        compressed_size, encode_time, decode_time = measure(encode_fn, decode_fn)
+        print(f"{name:>8}: size {compressed_size} B, "
+              f"encode {size_mb / encode_time:.2f} MB/s, decode {size_mb / decode_time:.2f} MB/s")
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["encode", "decode", "benchmark"], help="Operation to perform")
+    parser.add_argument("path", help="Path to the file ('-' reads standard input)")
+    parser.add_argument("--output", help="Output file ('-' writes standard output)")
+    args = parser.parse_args()
+
+    src = sys.stdin.buffer if args.path == "-" else args.path
+
+    if args.mode == "benchmark":
+        benchmark(args.path)
+    elif args.mode == "encode":
+        output = args.output or "compressed_file.ahuf"
+        encode_stream(src, sys.stdout.buffer if output == "-" else output)
+    else:
+        output = args.output or "decoded_output.bin"
+        decode_stream(src, sys.stdout.buffer if output == "-" else output)
@@ -0,0 +1,30 @@
+from bitarray import bitarray
+
+def code_lengths(huffman_codes):
+    lengths = bytearray(256)
+    for symbol, code in huffman_codes.items():
+        lengths[symbol] = len(code)
+    return bytes(lengths)
+
+def canonical_codes(lengths):
+    # symbols sorted by (code length, symbol) get consecutive code values;
+    # lengths is indexed by byte value or is a {symbol: length} dict
+    items = lengths.items() if isinstance(lengths, dict) else enumerate(lengths)
+    codes = {}
+    code = 0
+    prev_length = 0
+    for length, symbol in sorted((length, symbol) for symbol, length in items if length):
+        code <<= length - prev_length
+        codes[symbol] = bitarray(format(code, f'0{length}b'))
+        code += 1
+        prev_length = length
+    return codes
+
+def write_header(f, lengths):
+    f.write(bytes(lengths))
+
+def read_header(f):
+    lengths = f.read(256)
+    if len(lengths) != 256:
+        raise ValueError("Truncated Huffman header")
+    return lengths
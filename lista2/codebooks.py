@@ -0,0 +1,108 @@
+import argparse
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+from bitarray import bitarray
+
+from huffman_coder import build_codes, calc_probability, count_elements_stream
+from huffman_decoder import build_decode_tree, decode
+from canonical import canonical_codes, read_header, write_header
+from fileio import open_file
+
+CODEBOOK_DIR = os.environ.get("HUFFMAN_CODEBOOK_DIR", "codebooks")
+CODEBOOK_ID = re.compile(r'[A-Za-z0-9_.-]{1,255}')
+
+# Payload layout: id length (u8), id (ascii), padding bits (u8), bits
+
+def check_codebook_id(codebook_id):
+    if not CODEBOOK_ID.fullmatch(codebook_id) or codebook_id in (".", ".."):
+        raise ValueError(f"Invalid codebook id: {codebook_id!r}")
+
+def codebook_path(codebook_id, directory=CODEBOOK_DIR):
+    check_codebook_id(codebook_id)
+    return os.path.join(directory, codebook_id + ".huf")
+
+def train_codebook(sample_paths, max_length=None):
+    # every byte value gets a code, so any payload can be encoded later
+    codes_counts = Counter(range(256))
+    for path in sample_paths:
+        with open_file(path, 'rb') as f:
+            codes_counts.update(count_elements_stream(f))
+    lengths, _ = build_codes(codes_counts, calc_probability(codes_counts), max_length)
+    return lengths
+
+def save_codebook(codebook_id, lengths, directory=CODEBOOK_DIR):
+    os.makedirs(directory, exist_ok=True)
+    with open(codebook_path(codebook_id, directory), 'wb') as f:
+        write_header(f, lengths)
+    load_codebook.cache_clear()
+
+@lru_cache(maxsize=32)
+def load_codebook(codebook_id, directory=CODEBOOK_DIR):
+    with open(codebook_path(codebook_id, directory), 'rb') as f:
+        lengths = read_header(f)
+    huffman_codes = canonical_codes(lengths)
+    return huffman_codes, build_decode_tree(huffman_codes)
+
+def encode_with_codebook(data, codebook_id, directory=CODEBOOK_DIR):
+    huffman_codes, _ = load_codebook(codebook_id, directory)
+    coded_text = bitarray()
+    coded_text.encode(huffman_codes, data)
+    padbits = coded_text.fill()
+
+    name = codebook_id.encode('ascii')
+    return bytes([len(name)]) + name + bytes([padbits]) + coded_text.tobytes()
+
+def decode_with_codebook(data, directory=CODEBOOK_DIR):
+    name_length = data[0]
+    codebook_id = data[1:1 + name_length].decode('ascii')
+    padbits = data[1 + name_length]
+    _, tree = load_codebook(codebook_id, directory)
+
+    coded_text = bitarray()
+    coded_text.frombytes(data[2 + name_length:])
+    del coded_text[len(coded_text) - padbits:]
+    return decode(coded_text, tree)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    subparsers = parser.add_subparsers(dest="mode", required=True)
+
+    train_parser = subparsers.add_parser("train", help="Train a codebook from sample files")
+    train_parser.add_argument("id", help="Codebook id")
+    train_parser.add_argument("paths", nargs="+", help="Sample files")
+    train_parser.add_argument("--max-length", type=int, help="Limit code lengths to this many bits")
+
+    encode_parser = subparsers.add_parser("encode", help="Encode a file with a trained codebook")
+    encode_parser.add_argument("id", help="Codebook id")
+    encode_parser.add_argument("path", help="Path to the file")
+    encode_parser.add_argument("--output", default="compressed_file.bin", help="Output file (default: compressed_file.bin)")
+
+    decode_parser = subparsers.add_parser("decode", help="Decode a file encoded with a trained codebook")
+    decode_parser.add_argument("path", help="Path to the file")
+    decode_parser.add_argument("--output", default="decoded_output.bin", help="Output file (default: decoded_output.bin)")
+
+    for sub in (train_parser, encode_parser, decode_parser):
+        sub.add_argument("--dir", default=CODEBOOK_DIR, help=f"Codebook directory (default: {CODEBOOK_DIR})")
+    args = parser.parse_args()
+
+    if args.mode == "train":
+        save_codebook(args.id, train_codebook(args.paths, args.max_length), args.dir)
+        print(f"Codebook saved to {codebook_path(args.id, args.dir)}")
+    elif args.mode == "encode":
+        with open(args.path, 'rb') as f:
+            data = f.read()
+        encoded = encode_with_codebook(data, args.id, args.dir)
+        with open(args.output, 'wb') as f:
+            f.write(encoded)
+        print(f"Encoded {len(data)} bytes into {len(encoded)} bytes. Output written to {args.output}")
+    else:
+        with open(args.path, 'rb') as f:
+            data = f.read()
+        with open(args.output, 'wb') as f:
+            f.write(decode_with_codebook(data, args.dir))
+        print(f"Decoding completed. Output written to {args.output}")
@@ -0,0 +1,11 @@
+import os
+from contextlib import contextmanager
+
+@contextmanager
+def open_file(file, mode):
+    # paths are opened (and closed) here, file objects are used as they are
+    if isinstance(file, (str, bytes, os.PathLike)):
+        with open(file, mode) as f:
+            yield f
+    else:
+        yield file
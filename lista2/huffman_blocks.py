@@ -0,0 +1,181 @@
+import argparse
+import os
+import struct
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
+
+from bitarray import bitarray
+
+from huffman_coder import build_codes, calc_probability, count_elements_stream
+from huffman_decoder import build_decode_tree, decode
+from canonical import canonical_codes, read_header, write_header
+from fileio import open_file
+
+MAGIC = b'HUFB'
+HEADER = struct.Struct('<IQB')
+INDEX_ENTRY = struct.Struct('<QQ')
+TRAILER = struct.Struct('<QI')
+BLOCK_SIZE = 1 << 20
+
+# Container layout:
+#   MAGIC, HEADER (block size, total length, per-block tables flag)
+#   [256 code lengths]              only for a shared table
+#   blocks: [256 code lengths] + bits   lengths only with per-block tables
+#   index: (offset, number of bits) for every block
+#   TRAILER (index offset, number of blocks)
+
+def map_in_order(fn, iterable, max_workers=None):
+    # like pool.map, but keeps only a few blocks in flight instead of all of them
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers) as pool:
+        yield from _map_in_order(pool, fn, iterable, 2 * max_workers)
+
+def _map_in_order(pool, fn, iterable, window):
+    pending = deque()
+    for args in iterable:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def encode_block(block, huffman_codes=None):
+    prefix = b''
+    if huffman_codes is None:
+        codes_counts = Counter(block)
+        lengths, huffman_codes = build_codes(codes_counts, calc_probability(codes_counts))
+        prefix = lengths
+    coded_block = bitarray()
+    coded_block.encode(huffman_codes, block)
+    return prefix + coded_block.tobytes(), len(coded_block)
+
+@lru_cache(maxsize=64)
+def decode_tree_for(lengths):
+    return build_decode_tree(canonical_codes(lengths))
+
+def decode_block(payload, n_bits, lengths=None):
+    if lengths is None:
+        lengths, payload = payload[:256], payload[256:]
+    coded_block = bitarray()
+    coded_block.frombytes(payload)
+    del coded_block[n_bits:]
+    return decode(coded_block, decode_tree_for(bytes(lengths)))
+
+def encode_blocks(src, dst, block_size=BLOCK_SIZE, per_block_tables=False, max_workers=None):
+    with open_file(src, 'rb') as fin, open_file(dst, 'wb') as fout:
+        start = fin.tell()
+        huffman_codes = None
+        lengths = None
+        total_length = 0
+        if not per_block_tables:
+            codes_counts = count_elements_stream(fin, block_size)
+            total_length = sum(codes_counts.values())
+            if codes_counts:
+                lengths, huffman_codes = build_codes(codes_counts, calc_probability(codes_counts))
+            else:
+                lengths = bytes(256)
+            fin.seek(start)
+
+        fout.write(MAGIC)
+        header_offset = fout.tell()
+        fout.write(HEADER.pack(block_size, total_length, per_block_tables))
+        if lengths is not None:
+            write_header(fout, lengths)
+
+        def blocks():
+            nonlocal total_length
+            for block in iter(lambda: fin.read(block_size), b''):
+                if per_block_tables:
+                    total_length += len(block)
+                yield (block,)
+
+        index = []
+        encoder = partial(encode_block, huffman_codes=huffman_codes)
+        for payload, n_bits in map_in_order(encoder, blocks(), max_workers):
+            index.append((fout.tell(), n_bits))
+            fout.write(payload)
+
+        index_offset = fout.tell()
+        for entry in index:
+            fout.write(INDEX_ENTRY.pack(*entry))
+        fout.write(TRAILER.pack(index_offset, len(index)))
+
+        if per_block_tables:
+            end = fout.tell()
+            fout.seek(header_offset)
+            fout.write(HEADER.pack(block_size, total_length, per_block_tables))
+            fout.seek(end)
+
+    return total_length
+
+def read_container(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a block Huffman container")
+    block_size, total_length, per_block_tables = HEADER.unpack(f.read(HEADER.size))
+    lengths = None if per_block_tables else read_header(f)
+
+    f.seek(-TRAILER.size, 2)
+    index_offset, n_blocks = TRAILER.unpack(f.read(TRAILER.size))
+    f.seek(index_offset)
+    index = [INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size)) for _ in range(n_blocks)]
+    # the payload of a block ends where the next one (or the index) starts
+    offsets = [offset for offset, _ in index] + [index_offset]
+    blocks = [(offsets[i], offsets[i + 1] - offsets[i], index[i][1]) for i in range(n_blocks)]
+    return block_size, total_length, lengths, blocks
+
+def read_payloads(f, blocks):
+    for offset, size, n_bits in blocks:
+        f.seek(offset)
+        yield f.read(size), n_bits
+
+def decode_blocks(src, dst, max_workers=None):
+    with open_file(src, 'rb') as fin, open_file(dst, 'wb') as fout:
+        block_size, total_length, lengths, blocks = read_container(fin)
+        decoder = partial(decode_block, lengths=lengths)
+        for decoded_block in map_in_order(decoder, read_payloads(fin, blocks), max_workers):
+            fout.write(decoded_block)
+    return total_length
+
+def decode_range(src, start, end):
+    # only the blocks covering [start, end) are read and decoded
+    with open_file(src, 'rb') as fin:
+        block_size, total_length, lengths, blocks = read_container(fin)
+        start = max(0, start)
+        end = min(end, total_length)
+        if start >= end:
+            return b''
+
+        first = start // block_size
+        last = (end - 1) // block_size
+        decoded = bytearray()
+        for payload, n_bits in read_payloads(fin, blocks[first:last + 1]):
+            decoded += decode_block(payload, n_bits, lengths)
+    return bytes(decoded[start - first * block_size:end - first * block_size])
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["encode", "decode"], help="Operation to perform")
+    parser.add_argument("path", help="Path to the file")
+    parser.add_argument("--output", help="Output file (default: compressed_file.hufb / decoded_output.bin)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="Block size in bytes")
+    parser.add_argument("--per-block-tables", action="store_true", help="Build a separate code table for every block")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    parser.add_argument("--range", type=int, nargs=2, metavar=("START", "END"), help="Decode only bytes [START, END)")
+    args = parser.parse_args()
+
+    if args.mode == "encode":
+        output = args.output or "compressed_file.hufb"
+        total_length = encode_blocks(args.path, output, args.block_size, args.per_block_tables, args.workers)
+        print(f"Encoded {total_length} bytes. Output written to {output}")
+    elif args.range is not None:
+        output = args.output or "decoded_output.bin"
+        with open(output, 'wb') as f:
+            f.write(decode_range(args.path, *args.range))
+        print(f"Decoding completed. Output written to {output}")
+    else:
+        output = args.output or "decoded_output.bin"
+        decode_blocks(args.path, output, args.workers)
+        print(f"Decoding completed. Output written to {output}")
@@ -6,9 +6,13 @@ from collections import Counter
 from lista1.list_one import calc_probability, calc_information, calc_entropy
 import argparse
 from node import Node
+from canonical import code_lengths, canonical_codes, write_header
+from fileio import open_file
 import heapq
+import struct
 from bitarray import bitarray
-import pickle
+
+CHUNK_SIZE = 1 << 20
 
 def count_elements(text):
     return Counter(text)
@@ -26,44 +30,156 @@ def build_huffman_tree(codes_count, probabilities):
 
     return heap[0]
 
-def create_codes(node, prefix="", codebook={}):
-    if node is not None:
+def package_merge_lengths(codes_count, max_length):
+    # optimal code lengths with no code longer than max_length bits
+    leaves = sorted((freq, (symbol,)) for symbol, freq in codes_count.items())
+    n = len(leaves)
+    if n == 1:
+        return {leaves[0][1][0]: 1}
+    if n > 1 << max_length:
+        raise ValueError(f"Cannot code {n} symbols with codes of at most {max_length} bits")
+
+    items = leaves
+    for _ in range(max_length - 1):
+        packages = [
+            (items[i][0] + items[i + 1][0], items[i][1] + items[i + 1][1])
+            for i in range(0, len(items) - 1, 2)
+        ]
+        items = list(heapq.merge(leaves, packages, key=lambda item: item[0]))
+
+    lengths = Counter()
+    for _, symbols in items[:2 * n - 2]:
+        lengths.update(symbols)
+    return dict(lengths)
+
+def create_codes(node, prefix="", codebook=None):
+    if codebook is None:
+        codebook = {}
+    stack = [(node, prefix)]
+    while stack:
+        node, prefix = stack.pop()
+        if node is None:
+            continue
         if node.symbol is not None:
             codebook[node.symbol] = prefix
-        create_codes(node.left, prefix + "0", codebook)
-        create_codes(node.right, prefix + "1", codebook)
+        stack.append((node.right, prefix + "1"))
+        stack.append((node.left, prefix + "0"))
     return codebook
 
+def minimum_redundancy_lengths(freqs):
+    # In-place Moffat-Katajainen algorithm. freqs must be sorted ascending;
+    # the list is overwritten with the code length of every position.
+    n = len(freqs)
+    if n == 0:
+        return freqs
+    if n == 1:
+        freqs[0] = 1
+        return freqs
+
+    # phase 1: build the tree, storing parent indices over the weights
+    freqs[0] += freqs[1]
+    root = 0
+    leaf = 2
+    for nxt in range(1, n - 1):
+        if leaf >= n or freqs[root] < freqs[leaf]:
+            freqs[nxt] = freqs[root]
+            freqs[root] = nxt
+            root += 1
+        else:
+            freqs[nxt] = freqs[leaf]
+            leaf += 1
+
+        if leaf >= n or (root < nxt and freqs[root] < freqs[leaf]):
+            freqs[nxt] += freqs[root]
+            freqs[root] = nxt
+            root += 1
+        else:
+            freqs[nxt] += freqs[leaf]
+            leaf += 1
+
+    # phase 2: depths of the internal nodes
+    freqs[n - 2] = 0
+    for nxt in range(n - 3, -1, -1):
+        freqs[nxt] = freqs[freqs[nxt]] + 1
+
+    # phase 3: depths of the leaves
+    available = 1
+    used = 0
+    depth = 0
+    root = n - 2
+    nxt = n - 1
+    while available > 0:
+        while root >= 0 and freqs[root] == depth:
+            used += 1
+            root -= 1
+        while available > used:
+            freqs[nxt] = depth
+            nxt -= 1
+            available -= 1
+        available = 2 * used
+        depth += 1
+        used = 0
+    return freqs
+
 def calculate_average_code_length(codes, probabilities):
     avg_length = 0.0
     for symbol, code in codes.items():
         avg_length += probabilities[symbol] * len(code)
     return avg_length
 
-def perform_huffman_coding(file_path):
-    text = b""
-    with open(file_path, 'rb') as f:
-        text = f.read()
-    
-    if len(text) == 0:
-        print("File is empty. Exiting.")
-        return
+def count_elements_stream(f, chunk_size=CHUNK_SIZE):
+    codes_count = Counter()
+    for chunk in iter(lambda: f.read(chunk_size), b''):
+        codes_count.update(chunk)
+    return codes_count
+
+def build_codes(codes_counts, probabilities, max_length=None):
+    if max_length is not None:
+        lengths = bytearray(256)
+        for symbol, length in package_merge_lengths(probabilities, max_length).items():
+            lengths[symbol] = length
+        return bytes(lengths), canonical_codes(lengths)
 
-    codes_counts = count_elements(text)
-    probabilities = calc_probability(codes_counts)
     root = build_huffman_tree(codes_counts, probabilities)
     huffman_codes = create_codes(root)
     if len(huffman_codes) == 1:
         only_symbol = next(iter(huffman_codes))
         huffman_codes[only_symbol] = '0'
-    coded_text = bitarray()
-
-    for byte in text:
-        coded_text.extend(huffman_codes[byte])
 
-    with open("compressed_file.bin", 'wb') as f:
-        pickle.dump(huffman_codes, f)
-        coded_text.tofile(f)
+    lengths = code_lengths(huffman_codes)
+    return lengths, canonical_codes(lengths)
+
+def encode_file(src, dst, chunk_size=CHUNK_SIZE, max_length=None):
+    # two passes over src: count frequencies, then encode chunk by chunk
+    with open_file(src, 'rb') as fin:
+        start = fin.tell()
+        codes_counts = count_elements_stream(fin, chunk_size)
+        fin.seek(start)
+
+        probabilities = {}
+        lengths = bytes(256)
+        huffman_codes = {}
+        if codes_counts:
+            probabilities = calc_probability(codes_counts)
+            lengths, huffman_codes = build_codes(codes_counts, probabilities, max_length)
+
+        with open_file(dst, 'wb') as fout:
+            write_header(fout, lengths)
+            for chunk in iter(lambda: fin.read(chunk_size), b''):
+                coded_chunk = bitarray()
+                coded_chunk.encode(huffman_codes, chunk)
+                fout.write(struct.pack('<Q', len(coded_chunk)))
+                coded_chunk.tofile(fout)
+            fout.write(struct.pack('<Q', 0))
+
+    return probabilities, huffman_codes
+
+def perform_huffman_coding(file_path, output_path="compressed_file.bin", max_length=None):
+    probabilities, huffman_codes = encode_file(file_path, output_path, max_length=max_length)
+
+    if not probabilities:
+        print("File is empty. Exiting.")
+        return
 
     entropy = calc_entropy(
         probabilities,
@@ -74,6 +190,11 @@ def perform_huffman_coding(file_path):
 
     print("Entropy:", entropy)
     print("Average code length:", avg_code_length)
+    if max_length is not None:
+        _, unlimited_codes = build_codes(probabilities, probabilities)
+        unlimited_length = calculate_average_code_length(unlimited_codes, probabilities)
+        print("Average code length without limit:", unlimited_length)
+        print(f"Cost of {max_length}-bit limit:", avg_code_length - unlimited_length)
     print("Compression ratio:", 8 / avg_code_length)
 
 
@@ -84,9 +205,11 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("path", help="Path to the file")
+    parser.add_argument("--output", default="compressed_file.bin", help="Output file (default: compressed_file.bin)")
+    parser.add_argument("--max-length", type=int, help="Limit code lengths to this many bits (package-merge)")
     args = parser.parse_args()
 
-    perform_huffman_coding(args.path)
+    perform_huffman_coding(args.path, args.output, args.max_length)
 
 
 
@@ -1,32 +1,55 @@
-import pickle
-from bitarray import bitarray
+import struct
+from bitarray import bitarray, decodetree
+from canonical import canonical_codes, read_header
+from fileio import open_file
 import argparse
 
+def build_decode_tree(huffman_codes):
+    return decodetree({symbol: bitarray(code) for symbol, code in huffman_codes.items()})
+
+def decode(coded_text, huffman_codes):
+    # prefix codes are decoded natively by bitarray, without expanding bits to strings
+    tree = huffman_codes
+    if not isinstance(tree, decodetree):
+        tree = build_decode_tree(huffman_codes)
+    return bytes(coded_text.decode(tree))
+
+def read_chunk_bits(f):
+    size = f.read(8)
+    if len(size) != 8:
+        raise ValueError("Truncated Huffman stream")
+    return struct.unpack('<Q', size)[0]
+
+def decode_file(src, dst):
+    # every chunk is decoded on its own, so memory does not depend on the file size
+    decoded_length = 0
+    with open_file(src, 'rb') as fin, open_file(dst, 'wb') as fout:
+        huffman_codes = canonical_codes(read_header(fin))
+        tree = build_decode_tree(huffman_codes) if huffman_codes else None
+
+        n_bits = read_chunk_bits(fin)
+        while n_bits:
+            coded_chunk = bitarray()
+            coded_chunk.frombytes(fin.read((n_bits + 7) // 8))
+            if len(coded_chunk) < n_bits:
+                raise ValueError("Truncated Huffman stream")
+            del coded_chunk[n_bits:]
+
+            decoded_chunk = decode(coded_chunk, tree)
+            fout.write(decoded_chunk)
+            decoded_length += len(decoded_chunk)
+            n_bits = read_chunk_bits(fin)
+
+    return decoded_length
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("path", help="Path to the file")
+    parser.add_argument("--output", default="decoded_output.bin", help="Output file (default: decoded_output.bin)")
     args = parser.parse_args()
 
-    with open(args.path, 'rb') as f:
-        huffman_codes = pickle.load(f)
-        coded_text = bitarray()
-        coded_text.fromfile(f)
-
-    if len(coded_text) == 0:
+    if decode_file(args.path, args.output) == 0:
         print("File is empty. Nothing to decode.")
         exit()
 
-    inverse_codes = {v: k for k, v in huffman_codes.items()}
-
-    decoded_bytes = bytearray()
-    buffer = ""
-
-    for bit in coded_text.to01():
-        buffer += bit
-        if buffer in inverse_codes:
-            decoded_bytes.append(inverse_codes[buffer])
-            buffer = ""
-
-    with open("decoded_output.bin", 'wb') as f:
-        f.write(decoded_bytes)
-    print("Decoding completed. Output written to decoded_output.bin")
\ No newline at end of file
+    print(f"Decoding completed. Output written to {args.output}")
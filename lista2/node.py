@@ -1,4 +1,6 @@
 class Node:
+    __slots__ = ('symbol', 'freq', 'left', 'right')
+
     def __init__(self, symbol: int, freq: float, left=None, right=None):
         self.symbol = symbol
         self.freq = freq
@@ -0,0 +1,102 @@
+import argparse
+import re
+import struct
+from collections import Counter
+
+from bitarray import bitarray, decodetree
+
+from huffman_coder import minimum_redundancy_lengths
+from canonical import canonical_codes
+from fileio import open_file
+
+MAGIC = b'HUFS'
+WORD_PATTERN = re.compile(rb'\w+|\s+|[^\w\s]')
+
+# File layout:
+#   MAGIC, number of symbols (u32)
+#   for every symbol in canonical order: code length (u8), symbol length (u32), symbol bytes
+#   number of bits (u64), bits
+
+def tokenize(data, model):
+    if model == "byte":
+        return [data[i:i + 1] for i in range(len(data))]
+    if model == "pair":
+        return [data[i:i + 2] for i in range(0, len(data), 2)]
+    if model == "word":
+        return WORD_PATTERN.findall(data)
+    raise ValueError(f"Unknown symbol model: {model}")
+
+def symbol_code_lengths(codes_count):
+    symbols = sorted(codes_count, key=codes_count.__getitem__)
+    lengths = minimum_redundancy_lengths([codes_count[symbol] for symbol in symbols])
+    return dict(zip(symbols, lengths))
+
+def encode_symbols(data, model="word"):
+    symbols = tokenize(data, model)
+    lengths = symbol_code_lengths(Counter(symbols))
+    huffman_codes = canonical_codes(lengths)
+
+    coded_text = bitarray()
+    if symbols:
+        coded_text.encode(huffman_codes, symbols)
+
+    out = bytearray(MAGIC)
+    out += struct.pack('<I', len(huffman_codes))
+    for symbol in huffman_codes:
+        out += struct.pack('<BI', lengths[symbol], len(symbol))
+        out += symbol
+    out += struct.pack('<Q', len(coded_text))
+    out += coded_text.tobytes()
+    return bytes(out), lengths
+
+def decode_symbols(data):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a symbol-model Huffman file")
+    pos = len(MAGIC)
+    n_symbols, = struct.unpack_from('<I', data, pos)
+    pos += 4
+
+    lengths = {}
+    for _ in range(n_symbols):
+        length, size = struct.unpack_from('<BI', data, pos)
+        pos += 5
+        lengths[data[pos:pos + size]] = length
+        pos += size
+
+    n_bits, = struct.unpack_from('<Q', data, pos)
+    pos += 8
+    coded_text = bitarray()
+    coded_text.frombytes(data[pos:])
+    del coded_text[n_bits:]
+
+    if not lengths:
+        return b''
+    return b''.join(coded_text.decode(decodetree(canonical_codes(lengths))))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["encode", "decode"], help="Operation to perform")
+    parser.add_argument("path", help="Path to the file")
+    parser.add_argument("--model", choices=["byte", "pair", "word"], default="word", help="Symbol model (default: word)")
+    parser.add_argument("--output", help="Output file (default: compressed_file.hufs / decoded_output.bin)")
+    args = parser.parse_args()
+
+    with open_file(args.path, 'rb') as f:
+        data = f.read()
+
+    if args.mode == "encode":
+        output = args.output or "compressed_file.hufs"
+        encoded, lengths = encode_symbols(data, args.model)
+        with open(output, 'wb') as f:
+            f.write(encoded)
+        print("Number of symbols:", len(lengths))
+        print("Compressed size:", len(encoded))
+        if data:
+            print("Compression ratio:", len(data) / len(encoded))
+    else:
+        output = args.output or "decoded_output.bin"
+        with open(output, 'wb') as f:
+            f.write(decode_symbols(data))
+        print(f"Decoding completed. Output written to {output}")
@@ -0,0 +1,106 @@
+FLUSH_BITS = 256
+REFILL_BYTES = 32
+SOURCE_CHUNK = 1 << 16
+
+
+class BitWriter:
+    def __init__(self):
+        self._buffer = bytearray()
+        self._acc = 0
+        self._bits = 0
+
+    def write(self, value: int, width: int):
+        self._acc = (self._acc << width) | value
+        self._bits += width
+        if self._bits >= FLUSH_BITS:
+            self._flush_acc()
+
+    def _flush_acc(self):
+        # pełne bajty z akumulatora trafiają do bufora, reszta bitów zostaje
+        extra = self._bits & 7
+        self._buffer += (self._acc >> extra).to_bytes((self._bits - extra) >> 3, 'big')
+        self._acc &= (1 << extra) - 1
+        self._bits = extra
+
+    def bit_length(self) -> int:
+        return len(self._buffer) * 8 + self._bits
+
+    def take_bytes(self) -> bytes:
+        # pełne bajty zapisane do tej pory; niepełny bajt zostaje w akumulatorze
+        self._flush_acc()
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+    def getvalue(self) -> bytes:
+        pad = -self._bits % 8
+        tail = (self._acc << pad).to_bytes((self._bits + pad) >> 3, 'big')
+        return bytes(self._buffer) + tail
+
+
+class BitReader:
+    # Bity są czytane z okna (liczby całkowitej) doładowywanego po kilka bajtów,
+    # więc żaden bit nie jest rozwijany do znaku '0'/'1'. Z `source` (pliku)
+    # kolejne bajty są doczytywane dopiero, gdy skończą się te w `data`.
+    def __init__(self, data: bytes = b'', source=None):
+        self._data = data
+        self._source = source
+        self._index = 0
+        self._buf = 0
+        self._avail = 0
+
+    def remaining(self) -> int:
+        return self._avail + (len(self._data) - self._index) * 8
+
+    def _load(self, width: int):
+        while self._avail < width:
+            chunk = self._data[self._index:self._index + REFILL_BYTES]
+            if not chunk:
+                if self._source is None:
+                    return
+                self._data = self._source.read(SOURCE_CHUNK)
+                self._index = 0
+                if not self._data:
+                    self._source = None
+                continue
+            self._index += len(chunk)
+            self._buf = (self._buf << (len(chunk) * 8)) | int.from_bytes(chunk, 'big')
+            self._avail += len(chunk) * 8
+
+    def _refill(self, width: int):
+        self._load(width)
+        if self._avail < width:
+            raise ValueError("Nieoczekiwany koniec ciągu bitów.")
+
+    def read(self, width: int) -> int:
+        if self._avail < width:
+            self._refill(width)
+        self._avail -= width
+        value = self._buf >> self._avail
+        self._buf &= (1 << self._avail) - 1
+        return value
+
+    def peek(self, width: int) -> int:
+        # za końcem danych dopisywane są zera
+        if self._avail < width:
+            self._load(width)
+            if self._avail < width:
+                return self._buf << (width - self._avail)
+        return self._buf >> (self._avail - width)
+
+    def skip(self, width: int):
+        if self._avail < width:
+            self._refill(width)
+        self._avail -= width
+        self._buf &= (1 << self._avail) - 1
+
+    def count_zeros(self) -> int:
+        # pomija zera aż do najbliższej jedynki (jedynka nie jest zużywana)
+        zeros = 0
+        while self._buf == 0:
+            zeros += self._avail
+            self._avail = 0
+            self._refill(1)
+        skipped = self._avail - self._buf.bit_length()
+        self._avail -= skipped
+        return zeros + skipped
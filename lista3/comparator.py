@@ -1,26 +1,106 @@
-def compare_files(file1, file2):
-    """Porównuje zawartość dwóch plików."""
-    try:
-        with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
-            content1 = f1.read()
-            content2 = f2.read()
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 1 << 20
+
 
-        if content1 == content2:
-            print("Pliki mają taką samą zawartość.")
+def first_difference(chunk1, chunk2):
+    """Zwraca pozycję pierwszego różnego bajtu dwóch fragmentów (przez połowienie)."""
+    low, high = 0, min(len(chunk1), len(chunk2))
+    if chunk1[:high] == chunk2[:high]:
+        return high
+    # bajty [0, low) są równe, a w [low, high) jest różnica
+    while high - low > 1:
+        middle = (low + high) // 2
+        if chunk1[low:middle] == chunk2[low:middle]:
+            low = middle
         else:
-            print("Pliki różnią się zawartością.")
+            high = middle
+    return low
+
+
+def compare_files(file1, file2, chunk_size=CHUNK_SIZE):
+    """Porównuje zawartość dwóch plików fragment po fragmencie.
+
+    Zwraca słownik z polami equal, size1, size2, offset (pierwszy różny bajt
+    albo None) i error. Przy różnych rozmiarach plików nic nie jest czytane.
+    """
+    result = {"file1": file1, "file2": file2, "equal": False,
+              "size1": None, "size2": None, "offset": None, "error": None}
+    try:
+        result["size1"] = os.path.getsize(file1)
+        result["size2"] = os.path.getsize(file2)
+        if result["size1"] != result["size2"]:
+            return result
 
+        with open(file1, 'rb') as f1, open(file2, 'rb') as f2:
+            position = 0
+            while True:
+                chunk1 = f1.read(chunk_size)
+                chunk2 = f2.read(chunk_size)
+                if chunk1 != chunk2:
+                    result["offset"] = position + first_difference(chunk1, chunk2)
+                    return result
+                if not chunk1:
+                    break
+                position += len(chunk1)
+
+        result["equal"] = True
     except FileNotFoundError as e:
-        print(f"Błąd: nie znaleziono pliku - {e.filename}")
-    except Exception as e:
-        print(f"Wystąpił nieoczekiwany błąd: {e}")
+        result["error"] = f"nie znaleziono pliku - {e.filename}"
+    except OSError as e:
+        result["error"] = str(e)
+    return result
+
+
+def compare_many(pairs, max_workers=None):
+    """Porównuje wiele par (oryginał, plik zdekodowany) równolegle; wyniki w kolejności par."""
+    with ProcessPoolExecutor(max_workers) as pool:
+        files1, files2 = zip(*pairs) if pairs else ((), ())
+        return list(pool.map(compare_files, files1, files2))
+
+
+def describe(result):
+    if result["error"] is not None:
+        return f"Błąd: {result['error']}"
+    if result["equal"]:
+        return "Pliki mają taką samą zawartość."
+    if result["size1"] != result["size2"]:
+        return f"Pliki różnią się rozmiarem ({result['size1']} i {result['size2']} bajtów)."
+    return f"Pliki różnią się zawartością od bajtu {result['offset']}."
+
 
 if __name__ == "__main__":
     import argparse
+    import json
 
     parser = argparse.ArgumentParser(description="Porównaj zawartość dwóch plików.")
-    parser.add_argument("file1", help="Ścieżka do pierwszego pliku")
-    parser.add_argument("file2", help="Ścieżka do drugiego pliku")
+    parser.add_argument("file1", nargs="?", help="Ścieżka do pierwszego pliku")
+    parser.add_argument("file2", nargs="?", help="Ścieżka do drugiego pliku")
+    parser.add_argument("--pairs", help="Plik z parami ścieżek (oryginał i plik zdekodowany, oddzielone tabulatorem), po jednej parze w linii")
+    parser.add_argument("--workers", type=int, help="Liczba procesów przy porównywaniu par")
+    parser.add_argument("--json", action="store_true", help="Wypisz wyniki jako JSON")
     args = parser.parse_args()
 
-    compare_files(args.file1, args.file2)
+    if args.pairs is not None:
+        pairs = []
+        with open(args.pairs, encoding='utf-8') as f:
+            for number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                fields = line.rstrip('\n').split('\t')
+                if len(fields) != 2 or not all(fields):
+                    parser.error(f"{args.pairs}:{number}: oczekiwano dwóch ścieżek oddzielonych tabulatorem")
+                pairs.append(tuple(fields))
+        results = compare_many(pairs, args.workers)
+    elif args.file2 is None:
+        parser.error("podaj file1 i file2 albo --pairs")
+    else:
+        results = [compare_files(args.file1, args.file2)]
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    else:
+        for result in results:
+            prefix = f"{result['file1']} / {result['file2']}: " if args.pairs is not None else ""
+            print(prefix + describe(result))
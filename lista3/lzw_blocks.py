@@ -0,0 +1,156 @@
+import argparse
+import io
+import os
+import struct
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import universal_coding as uc
+from lzw_encoder import encode_lzw_array
+from lzw_decoder import decode_lzw
+
+MAGIC = b'LZWB'
+HEADER = struct.Struct('<IQB')
+BLOCK_HEADER = struct.Struct('<I')
+INDEX_ENTRY = struct.Struct('<Q')
+TRAILER = struct.Struct('<QI')
+BLOCK_SIZE = 1 << 20
+
+# Układ kontenera:
+#   MAGIC, HEADER (rozmiar bloku, długość całości, metoda)
+#   bloki: BLOCK_HEADER (długość po dekodowaniu) + kody uniwersalne kodów LZW bloku
+#   indeks: początek każdego bloku
+#   TRAILER (początek indeksu, liczba bloków)
+# Każdy blok zaczyna od świeżego słownika, więc bloki są kodowane niezależnie.
+
+def map_in_order(fn, iterable, max_workers=None):
+    # jak pool.map, ale w locie jest tylko kilka bloków, a nie wszystkie
+    max_workers = max_workers or os.cpu_count()
+    with ProcessPoolExecutor(max_workers) as pool:
+        yield from _map_in_order(pool, fn, iterable, 2 * max_workers)
+
+def _map_in_order(pool, fn, iterable, window):
+    pending = deque()
+    for args in iterable:
+        pending.append(pool.submit(fn, *args))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def encode_block(block, method):
+    return BLOCK_HEADER.pack(len(block)) + uc.encode_array(encode_lzw_array(block), method)
+
+def decode_block(payload, method):
+    length, = BLOCK_HEADER.unpack_from(payload)
+    block = decode_lzw(uc.decode_array(payload[BLOCK_HEADER.size:], method))
+    if len(block) != length:
+        raise ValueError("Niepoprawna długość zdekodowanego bloku")
+    return block
+
+def encode_blocks(fin, fout, method="omega", block_size=BLOCK_SIZE, max_workers=None):
+    fout.write(MAGIC)
+    header_offset = fout.tell()
+    fout.write(HEADER.pack(block_size, 0, uc.METHODS.index(method)))
+
+    total_length = 0
+    def blocks():
+        nonlocal total_length
+        for block in iter(lambda: fin.read(block_size), b''):
+            total_length += len(block)
+            yield (block,)
+
+    index = []
+    for payload in map_in_order(partial(encode_block, method=method), blocks(), max_workers):
+        index.append(fout.tell())
+        fout.write(payload)
+
+    index_offset = fout.tell()
+    for offset in index:
+        fout.write(INDEX_ENTRY.pack(offset))
+    fout.write(TRAILER.pack(index_offset, len(index)))
+
+    end = fout.tell()
+    fout.seek(header_offset)
+    fout.write(HEADER.pack(block_size, total_length, uc.METHODS.index(method)))
+    fout.seek(end)
+    return total_length
+
+def read_container(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("To nie jest blokowy kontener LZW")
+    block_size, total_length, method = HEADER.unpack(f.read(HEADER.size))
+
+    f.seek(-TRAILER.size, 2)
+    index_offset, n_blocks = TRAILER.unpack(f.read(TRAILER.size))
+    f.seek(index_offset)
+    offsets = [INDEX_ENTRY.unpack(f.read(INDEX_ENTRY.size))[0] for _ in range(n_blocks)]
+    offsets.append(index_offset)
+    blocks = [(offsets[i], offsets[i + 1] - offsets[i]) for i in range(n_blocks)]
+    return total_length, uc.METHODS[method], blocks
+
+def decode_blocks(fin, fout, max_workers=None):
+    total_length, method, blocks = read_container(fin)
+
+    def payloads():
+        for offset, size in blocks:
+            fin.seek(offset)
+            yield (fin.read(size),)
+
+    for block in map_in_order(partial(decode_block, method=method), payloads(), max_workers):
+        fout.write(block)
+    return total_length
+
+def benchmark(path, method="omega", block_size=BLOCK_SIZE):
+    with open(path, 'rb') as f:
+        data = f.read()
+    size_mb = len(data) / 1e6
+
+    workers = 1
+    while True:
+        compressed = io.BytesIO()
+        start = time.perf_counter()
+        encode_blocks(io.BytesIO(data), compressed, method, block_size, workers)
+        encode_time = time.perf_counter() - start
+
+        compressed.seek(0)
+        decoded = io.BytesIO()
+        start = time.perf_counter()
+        decode_blocks(compressed, decoded, workers)
+        decode_time = time.perf_counter() - start
+
+        if decoded.getvalue() != data:
+            raise ValueError("Dekodowanie nie odtworzyło danych")
+        print(f"{workers:>3} procesów: rozmiar {len(compressed.getvalue())} B, "
+              f"kodowanie {size_mb / encode_time:.2f} MB/s, dekodowanie {size_mb / decode_time:.2f} MB/s")
+
+        if workers >= os.cpu_count():
+            break
+        workers = min(2 * workers, os.cpu_count())
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["encode", "decode", "benchmark"], help="Operation to perform")
+    parser.add_argument("path", help="Path to the file")
+    parser.add_argument("--output", help="Output file (default: encoded_output.lzwb / decoded_output.bin)")
+    parser.add_argument("--method", choices=uc.METHODS, default="omega", help="Universal coding method to use (default: omega)")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="Block size in bytes")
+    parser.add_argument("--workers", type=int, help="Number of worker processes")
+    args = parser.parse_args()
+
+    if args.mode == "benchmark":
+        benchmark(args.path, args.method, args.block_size)
+    elif args.mode == "encode":
+        output = args.output or "encoded_output.lzwb"
+        with open(args.path, 'rb') as fin, open(output, 'wb') as fout:
+            total_length = encode_blocks(fin, fout, args.method, args.block_size, args.workers)
+        print(f"Zakodowano {total_length} bajtów. Wynik zapisano w {output}")
+    else:
+        output = args.output or "decoded_output.bin"
+        with open(args.path, 'rb') as fin, open(output, 'wb') as fout:
+            decode_blocks(fin, fout, args.workers)
+        print(f"Dekodowanie zakończone. Wynik zapisano w {output}")
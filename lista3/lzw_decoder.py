@@ -1,47 +1,136 @@
 import argparse
-import universal_coding as uc
+import math
 
+import universal_coding as uc
+from lzw_dictionary import POLICIES, LeafRecency, Primer, check_dictionary_limit
+from lzw_encoder import CODINGS, HEADER, PRIMER_FLAG
+from lzw_primer import load_primer
 
 
-def decode_lzw(codes: list[int]) -> bytes:
-    if not codes:
-        return b""
 
-    dict_size = 256
-    dictionary = {i: bytes([i]) for i in range(dict_size)}
+HISTORY_SLACK = 1 << 20
 
-    result = bytearray()
-    prev_code = codes[0]
-    result.extend(dictionary[prev_code])
 
-    for code in codes[1:]:
-        if code in dictionary:
-            entry = dictionary[code]
-        elif code == dict_size:
-            entry = dictionary[prev_code] + dictionary[prev_code][:1]
+class LZWDecoder:
+    # Słownik zmienia się dokładnie tak jak w LZWEncoder. Każda fraza stoi już
+    # w wyjściu, więc słownik pamięta tylko (początek w historii, długość) i
+    # fraza jest kopiowana stamtąd jednym wycinkiem. Przy dekodowaniu kawałkami
+    # historia jest przepisywana, gdy jest dużo dłuższa niż frazy ze słownika.
+    # Frazy z `primer` stoją na początku historii, przed wyjściem.
+    def __init__(self, max_size: int | None = None, policy: str = "freeze", primer: Primer | None = None):
+        self.base_size = 256 if primer is None else primer.size
+        check_dictionary_limit(max_size, policy, self.base_size)
+        self.limit = math.inf if max_size is None else max_size
+        self.policy = policy
+        self.dict_size = self.base_size
+        if primer is None:
+            self.offset, self.length, self.history = [0] * 256, [0] * 256, bytearray()
         else:
-            raise ValueError(f"Niepoprawny kod LZW: {code}")
-
-        result.extend(entry)
-        dictionary[dict_size] = dictionary[prev_code] + entry[:1]
-        dict_size += 1
-
-        prev_code = code
-
-    return bytes(result)
+            self.offset, self.length, self.history = list(primer.offset), list(primer.length), bytearray(primer.history)
+        self.base_live = len(self.history)
+        self.live = self.base_live
+        self.recency = LeafRecency(self.base_size) if policy == "lru" else None
+        self.prev_code = None
+        self.prev_start = 0
+
+    def _compact(self):
+        history = self.history
+        if len(history) <= 2 * self.live + HISTORY_SLACK:
+            return
+
+        compacted = bytearray()
+        offset, length = self.offset, self.length
+        for code in range(256, self.dict_size):
+            start = offset[code]
+            offset[code] = len(compacted)
+            compacted += history[start:start + length[code]]
+        # nowa fraza to poprzednia + pierwszy bajt następnej, więc poprzednia idzie na koniec
+        prev_start = self.prev_start
+        self.prev_start = len(compacted)
+        compacted += history[prev_start:]
+        self.history = compacted
+
+    def decode(self, codes) -> bytes:
+        # codes: array('I'), lista albo inna sekwencja kodów
+        if not codes:
+            return b""
+        self._compact()
+
+        limit, policy, recency = self.limit, self.policy, self.recency
+        offset, length = self.offset, self.length
+        dict_size = self.dict_size
+        result = self.history
+        output_start = len(result)
+
+        if self.prev_code is None:
+            first = codes[0]
+            if 256 <= first < dict_size:
+                result += result[offset[first]:offset[first] + length[first]]
+            elif 0 <= first < 256:
+                result.append(first)
+            else:
+                raise ValueError(f"Niepoprawny kod LZW: {first}")
+            self.prev_code, self.prev_start = first, output_start
+            codes = codes[1:]
+        prev_code, prev_start = self.prev_code, self.prev_start
+
+        for code in codes:
+            if recency is not None:
+                recency.use(prev_code)
+            slot = dict_size
+            if dict_size >= limit:
+                slot = None
+                if policy == "reset":
+                    dict_size = self.base_size
+                    self.live = self.base_live
+                elif policy == "lru":
+                    slot = recency.victim(prev_code)
+
+            start = len(result)
+            if code == slot:
+                # fraza jeszcze nie istnieje: prev + pierwszy bajt prev
+                result += result[prev_start:start]
+                result.append(result[prev_start])
+            elif 256 <= code < dict_size:
+                source = offset[code]
+                result += result[source:source + length[code]]
+            elif 0 <= code < 256:
+                result.append(code)
+            else:
+                raise ValueError(f"Niepoprawny kod LZW: {code}")
+
+            if slot is not None:
+                if slot != dict_size:
+                    recency.remove(slot)
+                    self.live -= length[slot]
+                if slot < len(offset):
+                    offset[slot] = prev_start
+                    length[slot] = start - prev_start + 1
+                else:
+                    offset.append(prev_start)
+                    length.append(start - prev_start + 1)
+                self.live += start - prev_start + 1
+                if recency is not None:
+                    recency.insert(slot, prev_code, result[start])
+                if slot == dict_size:
+                    dict_size += 1
+
+            prev_start = start
+            prev_code = code
+
+        self.prev_code, self.prev_start = prev_code, prev_start
+        self.dict_size = dict_size
+        return bytes(result[output_start:])
+
+
+def decode_lzw(codes, max_size: int | None = None, policy: str = "freeze", primer: Primer | None = None) -> bytes:
+    return LZWDecoder(max_size, policy, primer).decode(codes)
 
 
 if __name__ == "__main__":
 
     parser = argparse.ArgumentParser()
     parser.add_argument("path", help="Path to the file")
-    parser.add_argument(
-        "--method",
-        choices=["omega", "gamma", "delta", "fibonacci"],
-        default="omega",
-        help="Universal coding method to use (default: omega)"
-    )
-
     args = parser.parse_args()
 
     with open(args.path, 'rb') as f:
@@ -51,18 +140,22 @@ if __name__ == "__main__":
         print("File is empty. Exiting.")
         exit()
 
-    bitstream = ''.join(f'{byte:08b}' for byte in text)
-
-    if args.method == "gamma":
-        universal_decoded = uc.decode_with_elias_gamma(bitstream)
-    elif args.method == "delta":
-        universal_decoded = uc.decode_with_elias_delta(bitstream)
-    # elif args.method == "fibonacci":
-    #     universal_decoded = uc.decode_with_fibonacci(bitstream)
+    method, policy, max_size = HEADER.unpack_from(text)
+    payload = text[HEADER.size:]
+    primer = None
+    if method & PRIMER_FLAG:
+        method &= ~PRIMER_FLAG
+        primer = load_primer(payload[1:1 + payload[0]].decode('ascii'))
+        payload = payload[1 + payload[0]:]
+    method, policy, max_size = CODINGS[method], POLICIES[policy], max_size or None
+
+    if method == "fixed":
+        base_size = 256 if primer is None else primer.size
+        universal_decoded = uc.decode_fixed_width(payload, max_size, base_size)
     else:
-        universal_decoded = uc.decode_with_elias_omega(bitstream)
+        universal_decoded = uc.decode_array(payload, method)
 
-    result = decode_lzw(universal_decoded)
+    result = decode_lzw(universal_decoded, max_size, policy, primer)
 
     with open("decoded_output.bin", 'wb') as f:
         f.write(result)
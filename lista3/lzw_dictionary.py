@@ -0,0 +1,78 @@
+from collections import Counter, OrderedDict
+
+POLICIES = ("freeze", "reset", "lru")
+
+
+def check_dictionary_limit(max_size, policy, base_size=256):
+    if policy not in POLICIES:
+        raise ValueError(f"Nieznana polityka słownika: {policy}")
+    if max_size is not None and max_size < base_size:
+        raise ValueError(f"Słownik musi mieścić co najmniej {base_size} kodów")
+
+
+class Primer:
+    # Frazy wczytywane do słownika przed kodowaniem: kod 256 + i to fraza kodu
+    # prefixes[i] z dopisanym bajtem lasts[i]. Koder dostaje gotowe klucze trie,
+    # dekoder gotową historię z frazami i ich położeniem.
+    def __init__(self, prefixes, lasts: bytes):
+        if len(prefixes) != len(lasts):
+            raise ValueError("Niezgodne tablice fraz słownika")
+        self.prefixes = prefixes
+        self.lasts = lasts
+        self.size = 256 + len(lasts)
+        self.children = {}
+        self.history = bytearray()
+        self.offset = [0] * self.size
+        self.length = [0] * self.size
+
+        for code, (prefix, last) in enumerate(zip(prefixes, lasts), 256):
+            if prefix >= code:
+                raise ValueError(f"Niepoprawny prefiks frazy: {prefix}")
+            self.children[(prefix << 8) | last] = code
+            self.offset[code] = len(self.history)
+            if prefix < 256:
+                self.history.append(prefix)
+            else:
+                start = self.offset[prefix]
+                self.history += self.history[start:start + self.length[prefix]]
+            self.history.append(last)
+            self.length[code] = len(self.history) - self.offset[code]
+
+
+class LeafRecency:
+    # Kolejność ostatniego użycia fraz będących liśćmi drzewa (kody >= base_size bez
+    # dzieci). Tylko liść można usunąć bez psucia dłuższych fraz. Koder i dekoder
+    # wołają te same metody w tej samej kolejności, więc usuwają te same frazy.
+    # Kody poniżej base_size (bajty i frazy z Primer) nigdy nie są usuwane.
+    def __init__(self, base_size: int = 256):
+        self.base_size = base_size
+        self.parent = {}
+        self.last = {}
+        self.children = Counter()
+        self.leaves = OrderedDict()
+
+    def use(self, code: int):
+        if code in self.leaves:
+            self.leaves.move_to_end(code)
+
+    def victim(self, parent: int):
+        # najdawniej użyty liść poza rodzicem nowej frazy
+        for code in self.leaves:
+            if code != parent:
+                return code
+        return None
+
+    def remove(self, code: int) -> tuple[int, int]:
+        del self.leaves[code]
+        parent = self.parent.pop(code)
+        self.children[parent] -= 1
+        if parent >= self.base_size and not self.children[parent]:
+            self.leaves[parent] = None
+        return parent, self.last.pop(code)
+
+    def insert(self, code: int, parent: int, byte: int):
+        self.parent[code] = parent
+        self.last[code] = byte
+        self.children[parent] += 1
+        self.leaves.pop(parent, None)
+        self.leaves[code] = None
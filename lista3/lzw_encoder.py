@@ -1,41 +1,114 @@
 import argparse
 import math
+import struct
+from array import array
 from collections import Counter
 
 import universal_coding as uc
-
-def encode_lzw(data: bytes) -> list[int]:
-    dict_size = 256
-    dictionary = {bytes([i]): i for i in range(256)}
-
-    w = b""
-    result = []
-
-    for byte in data:
-        c = bytes([byte])
-        wc = w + c
-
-        if wc in dictionary:
-            w = wc
-        else:
-            result.append(dictionary[w])
-            dictionary[wc] = dict_size
-            dict_size += 1
-            w = c
-
-    if w:
-        result.append(dictionary[w])
-
-    return result
+from lzw_dictionary import POLICIES, LeafRecency, Primer, check_dictionary_limit
+
+# Plik wynikowy zaczyna się nagłówkiem (metoda, polityka, rozmiar słownika lub 0),
+# więc dekoder nie potrzebuje żadnych opcji. Ustawiony bit PRIMER_FLAG w metodzie
+# oznacza, że dalej jest identyfikator wytrenowanego słownika (długość u8 + ascii).
+CODINGS = uc.METHODS + ("fixed",)
+HEADER = struct.Struct('<BBI')
+PRIMER_FLAG = 0x80
+
+class LZWEncoder:
+    # Słownik jest drzewem trie: klucz (kod prefiksu << 8) | bajt -> kod frazy.
+    # Stan przechodzi między wywołaniami encode, więc dane mogą przychodzić kawałkami.
+    # Z `primer` słownik zaczyna (i po wyczyszczeniu wraca) od wytrenowanych fraz.
+    def __init__(self, max_size: int | None = None, policy: str = "freeze", primer: Primer | None = None):
+        self.base_size = 256 if primer is None else primer.size
+        self.base_children = {} if primer is None else primer.children
+        check_dictionary_limit(max_size, policy, self.base_size)
+        self.limit = math.inf if max_size is None else max_size
+        self.policy = policy
+        self.dict_size = self.base_size
+        self.children = dict(self.base_children)
+        self.recency = LeafRecency(self.base_size) if policy == "lru" else None
+        self.w = None
+
+    def encode(self, data: bytes) -> array:
+        data = memoryview(data)
+        if not data:
+            return array('I')
+
+        limit, policy, recency = self.limit, self.policy, self.recency
+        dict_size = self.dict_size
+        children = self.children
+
+        result = array('I')
+        append = result.append
+        lookup = children.get
+        w = self.w
+        if w is None:
+            w = data[0]
+            data = data[1:]
+
+        for byte in data:
+            key = (w << 8) | byte
+            code = lookup(key)
+
+            if code is not None:
+                w = code
+                continue
+
+            append(w)
+            slot = dict_size
+            if dict_size >= limit:
+                # pełny słownik: zamrożenie, wyczyszczenie albo usunięcie frazy
+                slot = None
+                if policy == "reset":
+                    children.clear()
+                    children.update(self.base_children)
+                    dict_size = self.base_size
+                elif policy == "lru":
+                    recency.use(w)
+                    slot = recency.victim(w)
+                    if slot is not None:
+                        parent, last = recency.remove(slot)
+                        del children[(parent << 8) | last]
+            elif recency is not None:
+                recency.use(w)
+
+            if slot is not None:
+                children[key] = slot
+                if recency is not None:
+                    recency.insert(slot, w, byte)
+                if slot == dict_size:
+                    dict_size += 1
+            w = byte
+
+        self.w = w
+        self.dict_size = dict_size
+        return result
+
+    def flush(self) -> array:
+        # kod ostatniej, niedokończonej frazy
+        if self.w is None:
+            return array('I')
+        w, self.w = self.w, None
+        return array('I', [w])
+
+
+def encode_lzw_array(data: bytes, max_size: int | None = None, policy: str = "freeze",
+                     primer: Primer | None = None) -> array:
+    encoder = LZWEncoder(max_size, policy, primer)
+    codes = encoder.encode(data)
+    codes += encoder.flush()
+    return codes
+
+
+def encode_lzw(data: bytes, max_size: int | None = None, policy: str = "freeze",
+               primer: Primer | None = None) -> list[int]:
+    return encode_lzw_array(data, max_size, policy, primer).tolist()
 
 def bits_to_bytes(bitstream: str) -> bytes:
-    while len(bitstream) % 8 != 0:
-        bitstream += "0"
-    b = bytearray()
-    for i in range(0, len(bitstream), 8):
-        byte = bitstream[i:i+8]
-        b.append(int(byte, 2))
-    return bytes(b)
+    bitstream += "0" * (-len(bitstream) % 8)
+    if not bitstream:
+        return b""
+    return int(bitstream, 2).to_bytes(len(bitstream) // 8, 'big')
 
 def entropy(data: bytes) -> float:
     if not data:
@@ -53,12 +126,23 @@ if __name__ == "__main__":
     parser.add_argument("path", help="Path to the file")
     parser.add_argument(
         "--method",
-        choices=["omega", "gamma", "delta", "fibonacci"],
+        choices=CODINGS + ("auto",),
         default="omega",
-        help="Universal coding method to use (default: omega)"
+        help="Universal coding method to use, 9..16-bit fixed-width codes, "
+             "or auto to pick the shortest universal code (default: omega)"
+    )
+    parser.add_argument("--max-size", type=int, help="Maximum dictionary size (default: unlimited, 65536 for fixed)")
+    parser.add_argument("--primer", help="Id of a trained dictionary to start from (see lzw_primer.py)")
+    parser.add_argument(
+        "--policy",
+        choices=POLICIES,
+        default="freeze",
+        help="What to do when the dictionary is full (default: freeze)"
     )
 
     args = parser.parse_args()
+    if args.method == "fixed" and args.max_size is None:
+        args.max_size = 1 << uc.FIXED_MAX_WIDTH
 
     with open(args.path, 'rb') as f:
         text = f.read()
@@ -67,18 +151,28 @@ if __name__ == "__main__":
         print("File is empty. Exiting.")
         exit()
 
-    lzw_encoded = encode_lzw(text)
+    primer = None
+    if args.primer is not None:
+        from lzw_primer import load_primer
+        primer = load_primer(args.primer)
+    lzw_encoded = encode_lzw_array(text, args.max_size, args.policy, primer)
 
-    if args.method == "gamma":
-        universal_encoded = uc.encode_with_elias_gamma(lzw_encoded)
-    elif args.method == "delta":
-        universal_encoded = uc.encode_with_elias_delta(lzw_encoded)
-    elif args.method == "fibonacci":
-        universal_encoded = uc.encode_with_fibonacci(lzw_encoded)
-    else:
-        universal_encoded = uc.encode_with_elias_omega(lzw_encoded)
+    if args.method == "auto":
+        args.method = uc.choose_method(lzw_encoded)
+        print("Wybrana metoda: ", args.method)
 
-    encoded_bytes = bits_to_bytes(universal_encoded)
+    method_id = CODINGS.index(args.method)
+    if primer is None:
+        header = HEADER.pack(method_id, POLICIES.index(args.policy), args.max_size or 0)
+    else:
+        name = args.primer.encode('ascii')
+        header = HEADER.pack(method_id | PRIMER_FLAG, POLICIES.index(args.policy), args.max_size or 0)
+        header += bytes([len(name)]) + name
+    if args.method == "fixed":
+        base_size = 256 if primer is None else primer.size
+        encoded_bytes = header + uc.encode_fixed_width(lzw_encoded, args.max_size, base_size)
+    else:
+        encoded_bytes = header + uc.encode_array(lzw_encoded, args.method)
 
     print("Długość pliku wejściowego: ", len(text))
     print("Długość kodowanego pliku: ", len(encoded_bytes))
@@ -0,0 +1,98 @@
+import argparse
+import os
+import re
+import struct
+from array import array
+from functools import lru_cache
+
+import numpy as np
+
+from lzw_dictionary import Primer
+from lzw_encoder import LZWEncoder
+
+PRIMER_DIR = os.environ.get("LZW_PRIMER_DIR", "primers")
+PRIMER_ID = re.compile(r'[A-Za-z0-9_.-]{1,255}')
+MAGIC = b'LZWP'
+COUNT = struct.Struct('<I')
+PRIMER_SIZE = 4096
+
+# Układ pliku: MAGIC, COUNT, prefiksy fraz (uint16, little endian), ostatnie bajty fraz
+
+
+def check_primer_id(primer_id):
+    if not PRIMER_ID.fullmatch(primer_id) or primer_id in (".", ".."):
+        raise ValueError(f"Niepoprawny identyfikator słownika: {primer_id!r}")
+
+
+def primer_path(primer_id, directory=PRIMER_DIR):
+    check_primer_id(primer_id)
+    return os.path.join(directory, primer_id + ".lzwp")
+
+
+def train_primer(sample_paths, size=PRIMER_SIZE) -> Primer:
+    # Frazy z LZW na próbkach, wybrane według liczby użyć razem z dłuższymi frazami,
+    # które od nich się zaczynają. Taka liczba nie jest mniejsza niż u żadnego
+    # potomka, więc razem z frazą wybierany jest zawsze cały jej prefiks.
+    if not 256 <= size <= 1 << 16:
+        raise ValueError("Rozmiar słownika musi być w zakresie 256..65536")
+
+    encoder = LZWEncoder()
+    codes = array('I')
+    for path in sample_paths:
+        with open(path, 'rb') as f:
+            codes += encoder.encode(f.read())
+    codes += encoder.flush()
+
+    parent = np.zeros(encoder.dict_size, dtype=np.int64)
+    last = np.zeros(encoder.dict_size, dtype=np.uint8)
+    for key, code in encoder.children.items():
+        parent[code] = key >> 8
+        last[code] = key & 0xFF
+
+    uses = np.bincount(np.asarray(codes, dtype=np.int64), minlength=encoder.dict_size)
+    for code in range(encoder.dict_size - 1, 255, -1):
+        uses[parent[code]] += uses[code]
+
+    candidates = np.arange(256, encoder.dict_size)
+    order = np.lexsort((candidates, -uses[256:]))
+    chosen = np.sort(candidates[order[:size - 256]])
+
+    renumber = np.arange(encoder.dict_size)
+    renumber[chosen] = np.arange(256, 256 + len(chosen))
+    return Primer(renumber[parent[chosen]].tolist(), last[chosen].tobytes())
+
+
+def save_primer(primer_id, primer: Primer, directory=PRIMER_DIR):
+    os.makedirs(directory, exist_ok=True)
+    with open(primer_path(primer_id, directory), 'wb') as f:
+        f.write(MAGIC + COUNT.pack(len(primer.lasts)))
+        f.write(np.asarray(primer.prefixes, dtype='<u2').tobytes())
+        f.write(primer.lasts)
+    load_primer.cache_clear()
+
+
+@lru_cache(maxsize=32)
+def load_primer(primer_id, directory=PRIMER_DIR) -> Primer:
+    with open(primer_path(primer_id, directory), 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("To nie jest plik słownika LZW")
+        count, = COUNT.unpack(f.read(COUNT.size))
+        prefixes = np.frombuffer(f.read(2 * count), dtype='<u2').tolist()
+        lasts = f.read(count)
+    if len(prefixes) != count or len(lasts) != count:
+        raise ValueError("Uszkodzony plik słownika LZW")
+    return Primer(prefixes, lasts)
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("id", help="Dictionary id")
+    parser.add_argument("paths", nargs="+", help="Sample files")
+    parser.add_argument("--size", type=int, default=PRIMER_SIZE, help=f"Number of dictionary codes including the 256 bytes (default: {PRIMER_SIZE})")
+    parser.add_argument("--dir", default=PRIMER_DIR, help=f"Dictionary directory (default: {PRIMER_DIR})")
+    args = parser.parse_args()
+
+    primer = train_primer(args.paths, args.size)
+    save_primer(args.id, primer, args.dir)
+    print(f"Zapisano {primer.size - 256} fraz do {primer_path(args.id, args.dir)}")
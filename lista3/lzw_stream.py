@@ -0,0 +1,76 @@
+import argparse
+import struct
+import sys
+from array import array
+
+import universal_coding as uc
+from bitio import BitWriter, BitReader
+from lzw_dictionary import POLICIES
+from lzw_encoder import LZWEncoder
+from lzw_decoder import LZWDecoder
+
+MAGIC = b'LZWS'
+HEADER = struct.Struct('<BBI')
+CHUNK_SIZE = 1 << 16
+CODE_BATCH = 1 << 14
+END_OF_STREAM = 1
+
+# Układ strumienia: MAGIC, HEADER (metoda, polityka, rozmiar słownika lub 0),
+# potem każdy kod LZW jako kod uniwersalny liczby kod + 2 i na końcu END_OF_STREAM,
+# więc liczba kodów nie musi być znana z góry.
+
+def encode_stream(fin, fout, method="omega", max_size=None, policy="freeze", chunk_size=CHUNK_SIZE):
+    encoder = LZWEncoder(max_size, policy)
+    write = uc.WRITERS[method]
+    writer = BitWriter()
+
+    fout.write(MAGIC + HEADER.pack(uc.METHODS.index(method), POLICIES.index(policy), max_size or 0))
+    for chunk in iter(lambda: fin.read(chunk_size), b''):
+        for code in encoder.encode(chunk):
+            write(writer, code + 2)
+        fout.write(writer.take_bytes())
+
+    for code in encoder.flush():
+        write(writer, code + 2)
+    write(writer, END_OF_STREAM)
+    fout.write(writer.getvalue())
+
+def decode_stream(fin, fout):
+    if fin.read(len(MAGIC)) != MAGIC:
+        raise ValueError("To nie jest strumień LZW")
+    method, policy, max_size = HEADER.unpack(fin.read(HEADER.size))
+    decoder = LZWDecoder(max_size or None, POLICIES[policy])
+    read = uc.READERS[uc.METHODS[method]]
+    reader = BitReader(source=fin)
+
+    codes = array('I')
+    while True:
+        n = read(reader)
+        if n == END_OF_STREAM:
+            break
+        codes.append(n - 2)
+        if len(codes) >= CODE_BATCH:
+            fout.write(decoder.decode(codes))
+            codes = array('I')
+    fout.write(decoder.decode(codes))
+
+
+if __name__ == "__main__":
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("mode", choices=["encode", "decode"], help="Operation to perform")
+    parser.add_argument("path", help="Path to the file ('-' reads standard input)")
+    parser.add_argument("--output", help="Output file ('-' writes standard output)")
+    parser.add_argument("--method", choices=uc.METHODS, default="omega", help="Universal coding method to use (default: omega)")
+    parser.add_argument("--max-size", type=int, help="Maximum dictionary size (default: unlimited)")
+    parser.add_argument("--policy", choices=POLICIES, default="freeze", help="What to do when the dictionary is full (default: freeze)")
+    args = parser.parse_args()
+
+    output = args.output or ("encoded_output.lzws" if args.mode == "encode" else "decoded_output.bin")
+    fin = sys.stdin.buffer if args.path == "-" else open(args.path, 'rb')
+    fout = sys.stdout.buffer if output == "-" else open(output, 'wb')
+    with fin, fout:
+        if args.mode == "encode":
+            encode_stream(fin, fout, args.method, args.max_size, args.policy)
+        else:
+            decode_stream(fin, fout)
@@ -0,0 +1,57 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pytest
+
+import universal_coding as uc
+from lzw_decoder import decode_lzw
+from lzw_encoder import encode_lzw_array
+from lzw_primer import train_primer
+
+
+@pytest.fixture(scope="module")
+def data():
+    rng = random.Random(0)
+    words = [bytes(rng.choices(b"abcdefgh", k=rng.randint(2, 9))) for _ in range(300)]
+    return b" ".join(rng.choice(words) for _ in range(20000))
+
+
+@pytest.fixture(scope="module", params=[400, 744])
+def primer(request, data, tmp_path_factory):
+    sample = tmp_path_factory.mktemp("primer") / "sample.bin"
+    sample.write_bytes(data[:50000])
+    primer = train_primer([str(sample)], 256 + request.param)
+    assert primer.size == 256 + request.param
+    return primer
+
+
+@pytest.mark.parametrize("max_size, policy", [
+    (None, "freeze"),
+    (4096, "freeze"),
+    (4096, "reset"),
+    (2048, "lru"),
+])
+def test_fixed_width_round_trip_with_primer(data, primer, max_size, policy):
+    max_size = max_size or 1 << uc.FIXED_MAX_WIDTH
+    payload = data[50000:]
+    codes = encode_lzw_array(payload, max_size, policy, primer)
+    assert max(codes) >= 512
+
+    encoded = uc.encode_fixed_width(codes, max_size, primer.size)
+    decoded_codes = uc.decode_fixed_width(encoded, max_size, primer.size)
+    assert decoded_codes == codes
+    assert decode_lzw(decoded_codes, max_size, policy, primer) == payload
+
+
+def test_fixed_width_round_trip_without_primer(data):
+    codes = encode_lzw_array(data, 4096, "reset")
+    encoded = uc.encode_fixed_width(codes, 4096)
+    assert uc.decode_fixed_width(encoded, 4096) == codes
+
+
+def test_fixed_width_rejects_primer_larger_than_dictionary(primer):
+    with pytest.raises(ValueError):
+        uc.encode_fixed_width([0], 300, primer.size)
@@ -0,0 +1,47 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pytest
+
+import universal_coding as uc
+from lzw_encoder import encode_lzw_array
+
+ENCODERS = {
+    "omega": (uc.encode_with_elias_omega, uc.decode_with_elias_omega),
+    "gamma": (uc.encode_with_elias_gamma, uc.decode_with_elias_gamma),
+    "delta": (uc.encode_with_elias_delta, uc.decode_with_elias_delta),
+    "fibonacci": (uc.encode_with_fibonacci, uc.decode_with_fibonacci),
+}
+
+
+@pytest.mark.parametrize("method", uc.METHODS)
+def test_batch_matches_scalar_at_limit(method):
+    encode, decode = ENCODERS[method]
+    # encode_array koduje index + 1, więc największa dozwolona liczba to limit - 1
+    indices = [0, 2 ** 20, uc.BATCH_LIMITS[method] - 2]
+
+    encoded = uc.encode_array(np.array(indices, dtype=np.uint64), method)
+    assert encoded == encode(indices)
+    assert decode(encoded) == indices
+    assert uc.encoded_sizes(indices)[method] == len(encoded)
+
+
+@pytest.mark.parametrize("method", uc.METHODS)
+def test_batch_rejects_limit(method):
+    with pytest.raises(ValueError):
+        uc.encode_array(np.array([uc.BATCH_LIMITS[method] - 1], dtype=np.uint64), method)
+    assert method not in uc.encoded_sizes([uc.BATCH_LIMITS[method] - 1])
+
+
+def test_fixed_width_rejects_codes_wider_than_dictionary():
+    data = np.random.default_rng(0).integers(0, 256, size=200_000, dtype=np.uint8).tobytes()
+    codes = encode_lzw_array(data)
+    assert max(codes) >= 1 << uc.FIXED_MAX_WIDTH
+    with pytest.raises(ValueError):
+        uc.encode_fixed_width(codes)
+
+    bounded = encode_lzw_array(data, 1 << uc.FIXED_MAX_WIDTH, "reset")
+    assert uc.decode_fixed_width(uc.encode_fixed_width(bounded)) == bounded
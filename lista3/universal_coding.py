@@ -1,3 +1,14 @@
+from array import array
+from bisect import bisect_right
+
+import numpy as np
+
+from bitio import BitWriter, BitReader
+
+WINDOW = 64
+WINDOW_MASK = (1 << WINDOW) - 1
+
+
 def elias_omega_encode(n: int) -> str:
     if n < 1:
         raise ValueError("Elias omega koduje tylko liczby >= 1")
@@ -11,64 +22,81 @@ def elias_omega_encode(n: int) -> str:
     return code
 
 
-def encode_with_elias_omega(indices: list[int]) -> str:
-    count = len(indices)
-    header = elias_omega_encode(count + 1)
-    bits = [header]
-    for index in indices:
-        n = index + 1
-        bits.append(elias_omega_encode(n))
-    result = ''.join(bits)
-    return result
+def omega_prefixes(limit: int) -> list[tuple[int, int]]:
+    # prefixes[k] = (wartość, długość) grup kodu omega poprzedzających grupę liczby n,
+    # gdzie k = n.bit_length() - 1
+    prefixes = [(0, 0), (0, 0)]
+    for k in range(2, limit):
+        value, width = prefixes[k.bit_length() - 1]
+        prefixes.append(((value << k.bit_length()) | k, width + k.bit_length()))
+    return prefixes
 
 
-def decode_with_elias_omega(bitstream: str) -> list[int]:
-    decoded_indices = []
-    pos = 0
-    length_stream = len(bitstream)
+OMEGA_PREFIXES = omega_prefixes(1024)
 
-    n = 1
-    while True:
-        if pos >= length_stream:
-            return []
 
-        if bitstream[pos] == '0':
-            pos += 1
-            break
+def write_elias_omega(writer: BitWriter, n: int):
+    if n < 1:
+        raise ValueError("Elias omega koduje tylko liczby >= 1")
 
-        bits_to_read = n + 1
-        segment = bitstream[pos: pos + bits_to_read]
+    if n == 1:
+        writer.write(0, 1)
+        return
+    L = n.bit_length()
+    value, width = OMEGA_PREFIXES[L - 1]
+    writer.write((((value << L) | n) << 1), width + L + 1)
+
+
+def parse_omega_groups(window: int, pos: int, n: int = 1) -> tuple[int, int, bool]:
+    # rozbiera grupy kodu omega z górnych `pos` bitów okna;
+    # zwraca (n, liczba pozostałych bitów, czy napotkano końcowe zero)
+    while pos > 0:
+        if not (window >> (pos - 1)) & 1:
+            return n, pos - 1, True
+        if pos <= n:
+            break
+        pos -= n + 1
+        n = (window >> pos) & ((1 << (n + 1)) - 1)
+    return n, pos, False
 
-        if len(segment) < bits_to_read:
-            return []
 
-        n = int(segment, 2)
-        pos += bits_to_read
+OMEGA_TABLE_BITS = 12
+OMEGA_TABLE = [parse_omega_groups(window, OMEGA_TABLE_BITS) for window in range(1 << OMEGA_TABLE_BITS)]
 
-    count = n - 1
 
-    for _ in range(count):
-        n = 1
-        while True:
-            if pos >= length_stream:
-                raise ValueError("Nieoczekiwany koniec ciągu bitów.")
+def read_elias_omega(reader: BitReader) -> int:
+    # początkowe grupy z tablicy dla 12 bitów, dalsze z 64-bitowego okna
+    window = reader.peek(WINDOW)
+    n, pos, done = OMEGA_TABLE[window >> (WINDOW - OMEGA_TABLE_BITS)]
+    pos += WINDOW - OMEGA_TABLE_BITS
+    if not done:
+        n, pos, done = parse_omega_groups(window, pos, n)
+    reader.skip(WINDOW - pos)
+    if done:
+        return n
 
-            if bitstream[pos] == '0':
-                pos += 1
-                break
+    # kod dłuższy niż okno
+    while reader.read(1):
+        n = (1 << n) | reader.read(n)
+    return n
 
-            bits_to_read = n + 1
-            segment = bitstream[pos: pos + bits_to_read]
 
-            if len(segment) < bits_to_read:
-                raise ValueError(f"Uszkodzony kod. Oczekiwano {bits_to_read} bitów, znaleziono {len(segment)}")
+def encode_with_elias_omega(indices: list[int]) -> bytes:
+    writer = BitWriter()
+    write_elias_omega(writer, len(indices) + 1)
+    for index in indices:
+        write_elias_omega(writer, index + 1)
+    return writer.getvalue()
 
-            n = int(segment, 2)
-            pos += bits_to_read
 
-        decoded_indices.append(n - 1)
+def decode_with_elias_omega(data: bytes) -> list[int]:
+    reader = BitReader(data)
+    try:
+        count = read_elias_omega(reader) - 1
+    except ValueError:
+        return []
 
-    return decoded_indices
+    return [read_elias_omega(reader) - 1 for _ in range(count)]
 
 
 def elias_gamma_encode(n: int) -> str:
@@ -81,50 +109,40 @@ def elias_gamma_encode(n: int) -> str:
     return prefix + b
 
 
-def encode_with_elias_gamma(indices: list[int]) -> str:
-    count = len(indices)
-    header = elias_gamma_encode(count + 1)
-    bitstream = header
-    for index in indices:
-        n = index + 1
-        bitstream += elias_gamma_encode(n)
-    return bitstream
-
+def write_elias_gamma(writer: BitWriter, n: int):
+    if n < 1:
+        raise ValueError("Elias gamma koduje tylko liczby >= 1")
 
-def decode_with_elias_gamma(bitstream: str) -> list[int]:
-    indices = []
-    i = 0
-    length_stream = len(bitstream)
+    writer.write(n, 2 * n.bit_length() - 1)
 
-    zeros = 0
-    while i < length_stream and bitstream[i] == '0':
-        zeros += 1
-        i += 1
 
-    if i + zeros >= length_stream:
-        return []
+def read_elias_gamma(reader: BitReader) -> int:
+    window = reader.peek(WINDOW)
+    width = 2 * (WINDOW - window.bit_length()) + 1
+    if width <= WINDOW:
+        reader.skip(width)
+        return window >> (WINDOW - width)
 
-    L_bin = bitstream[i:i + zeros + 1]
-    i += zeros + 1
-    L = int(L_bin, 2)
+    zeros = reader.count_zeros()
+    return reader.read(zeros + 1)
 
-    count = L - 1
 
-    for _ in range(count):
-        zeros = 0
-        while i < length_stream and bitstream[i] == '0':
-            zeros += 1
-            i += 1
+def encode_with_elias_gamma(indices: list[int]) -> bytes:
+    writer = BitWriter()
+    write_elias_gamma(writer, len(indices) + 1)
+    for index in indices:
+        write_elias_gamma(writer, index + 1)
+    return writer.getvalue()
 
-        if i + zeros >= length_stream:
-            raise ValueError("Nieoczekiwany koniec ciągu bitów.")
 
-        b = bitstream[i:i + zeros + 1]
-        i += zeros + 1
-        n = int(b, 2)
-        indices.append(n - 1)
+def decode_with_elias_gamma(data: bytes) -> list[int]:
+    reader = BitReader(data)
+    try:
+        count = read_elias_gamma(reader) - 1
+    except ValueError:
+        return []
 
-    return indices
+    return [read_elias_gamma(reader) - 1 for _ in range(count)]
 
 
 def elias_delta_encode(n: int) -> str:
@@ -137,63 +155,45 @@ def elias_delta_encode(n: int) -> str:
     return gamma_of_L + b[1:]
 
 
-def encode_with_elias_delta(indices: list[int]) -> str:
-    count = len(indices)
-    header = elias_delta_encode(count + 1)
-    bitstream = header
-    for index in indices:
-        n = index + 1
-        bitstream += elias_delta_encode(n)
-    return bitstream
-
-
-def decode_with_elias_delta(bitstream: str) -> list[int]:
-    indices = []
-    i = 0
-    length_stream = len(bitstream)
-
-    zeros = 0
-    while i < length_stream and bitstream[i] == '0':
-        zeros += 1
-        i += 1
-
-    if i + zeros >= length_stream:
-        return []
+def write_elias_delta(writer: BitWriter, n: int):
+    if n < 1:
+        raise ValueError("Elias delta koduje tylko liczby >= 1")
 
-    L_bin = bitstream[i:i + zeros + 1]
-    i += zeros + 1
-    L = int(L_bin, 2)
+    L = n.bit_length()
+    write_elias_gamma(writer, L)
+    writer.write(n & ((1 << (L - 1)) - 1), L - 1)
 
-    if i + (L - 1) >= length_stream:
-        return []
 
-    n_bin = '1' + bitstream[i:i + (L - 1)]
-    i += L - 1
-    L_count = int(n_bin, 2)
-    count = L_count - 1
+def read_elias_delta(reader: BitReader) -> int:
+    window = reader.peek(WINDOW)
+    gamma_width = 2 * (WINDOW - window.bit_length()) + 1
+    if gamma_width <= WINDOW:
+        L = window >> (WINDOW - gamma_width)
+        width = gamma_width + L - 1
+        if width <= WINDOW:
+            reader.skip(width)
+            return (1 << (L - 1)) | ((window >> (WINDOW - width)) & ((1 << (L - 1)) - 1))
 
-    for _ in range(count):
-        zeros = 0
-        while i < length_stream and bitstream[i] == '0':
-            zeros += 1
-            i += 1
+    L = read_elias_gamma(reader)
+    return (1 << (L - 1)) | reader.read(L - 1)
 
-        if i + zeros >= length_stream:
-            raise ValueError("Nieoczekiwany koniec ciągu bitów.")
 
-        L_bin = bitstream[i:i + zeros + 1]
-        i += zeros + 1
-        L = int(L_bin, 2)
+def encode_with_elias_delta(indices: list[int]) -> bytes:
+    writer = BitWriter()
+    write_elias_delta(writer, len(indices) + 1)
+    for index in indices:
+        write_elias_delta(writer, index + 1)
+    return writer.getvalue()
 
-        if i + (L - 1) > length_stream:
-            raise ValueError("Nieoczekiwany koniec ciągu bitów.")
 
-        n_bin = '1' + bitstream[i:i + (L - 1)]
-        i += L - 1
-        n = int(n_bin, 2)
-        indices.append(n - 1)
+def decode_with_elias_delta(data: bytes) -> list[int]:
+    reader = BitReader(data)
+    try:
+        count = read_elias_delta(reader) - 1
+    except ValueError:
+        return []
 
-    return indices
+    return [read_elias_delta(reader) - 1 for _ in range(count)]
 
 
 def fibonacci_numbers_upto(n):
@@ -209,28 +209,294 @@ def fibonacci_encode(n):
     if n < 1:
         raise ValueError("Fibonacci wymaga n >= 1")
 
+    # cyfry od najmniejszej liczby Fibonacciego, na końcu dodatkowa jedynka ("11")
     fibs = fibonacci_numbers_upto(n)
-    code = []
-    for f in reversed(fibs):
-        if f <= n:
-            code.append('1')
-            n -= f
-        else:
-            code.append('0')
+    code = ['0'] * len(fibs)
+    for i in range(len(fibs) - 1, -1, -1):
+        if fibs[i] <= n:
+            code[i] = '1'
+            n -= fibs[i]
     code.append('1')
     return ''.join(code)
 
 
-def encode_with_fibonacci(indices: list[int]) -> str:
-    count = len(indices)
-    header = fibonacci_encode(count + 1)
-    bitstream = header
+FIBS = fibonacci_numbers_upto(1 << 64)
+
+
+def fibonacci_byte_tables(groups: int) -> list[list[int]]:
+    # tables[g][b] = suma liczb Fibonacciego dla cyfr 8g..8g+7 zapisanych w bajcie b
+    tables = []
+    for g in range(groups):
+        table = [0] * 256
+        for byte in range(256):
+            for j in range(8):
+                if byte & (0x80 >> j):
+                    table[byte] += FIBS[8 * g + j]
+        tables.append(table)
+    return tables
+
+
+FIB_BYTE_TABLES = fibonacci_byte_tables(8)
+
+
+def write_fibonacci(writer: BitWriter, n: int):
+    if n < 1:
+        raise ValueError("Fibonacci wymaga n >= 1")
+
+    while FIBS[-1] <= n:
+        FIBS.append(FIBS[-1] + FIBS[-2])
+    count = bisect_right(FIBS, n)
+    value = 0
+    for i in range(count - 1, -1, -1):
+        if FIBS[i] <= n:
+            value |= 1 << (count - i)
+            n -= FIBS[i]
+    writer.write(value | 1, count + 1)
+
+
+def read_fibonacci(reader: BitReader) -> int:
+    window = reader.peek(WINDOW)
+    # pierwsze "11" w oknie kończy kod (w reprezentacji Zeckendorfa nie ma dwóch jedynek obok siebie)
+    pairs = window & (window >> 1)
+    if pairs:
+        end = pairs.bit_length() - 1
+        reader.skip(WINDOW - end)
+        digits = (window >> (end + 1)) << (end + 1)
+        n = 0
+        g = 0
+        while digits:
+            n += FIB_BYTE_TABLES[g][(digits >> (WINDOW - 8)) & 0xFF]
+            digits = (digits << 8) & WINDOW_MASK
+            g += 1
+        return n
+
+    # kod dłuższy niż okno
+    n = 0
+    i = 0
+    prev = 0
+    while True:
+        bit = reader.read(1)
+        if bit and prev:
+            return n
+        if bit:
+            while len(FIBS) <= i:
+                FIBS.append(FIBS[-1] + FIBS[-2])
+            n += FIBS[i]
+        prev = bit
+        i += 1
+
+
+def encode_with_fibonacci(indices: list[int]) -> bytes:
+    writer = BitWriter()
+    write_fibonacci(writer, len(indices) + 1)
     for index in indices:
-        bitstream += fibonacci_encode(index + 1)
-    return bitstream
+        write_fibonacci(writer, index + 1)
+    return writer.getvalue()
+
+
+def decode_with_fibonacci(data: bytes) -> list[int]:
+    reader = BitReader(data)
+    try:
+        count = read_fibonacci(reader) - 1
+    except ValueError:
+        return []
 
+    return [read_fibonacci(reader) - 1 for _ in range(count)]
 
 
+# Kody LZW między etapami jako zwarta tablica array('I') zamiast listy intów.
+
+METHODS = ("omega", "gamma", "delta", "fibonacci")
+WRITERS = {
+    "omega": write_elias_omega,
+    "gamma": write_elias_gamma,
+    "delta": write_elias_delta,
+    "fibonacci": write_fibonacci,
+}
+READERS = {
+    "omega": read_elias_omega,
+    "gamma": read_elias_gamma,
+    "delta": read_elias_delta,
+    "fibonacci": read_fibonacci,
+}
+
+
+def decode_array(data: bytes, method: str) -> array:
+    read = READERS[method]
+    reader = BitReader(data)
+    try:
+        count = read(reader) - 1
+    except ValueError:
+        return array('I')
+
+    indices = array('I')
+    append = indices.append
+    for _ in range(count):
+        append(read(reader) - 1)
+    return indices
+
+
+# Kody o stałej szerokości jak w `compress`: i-ty kod LZW jest mniejszy od
+# min(base_size + i, max_size), gdzie base_size to rozmiar słownika na starcie
+# (256 albo więcej z wytrenowanymi frazami), więc szerokość rośnie razem z indeksem.
+
+FIXED_MIN_WIDTH = 9
+FIXED_MAX_WIDTH = 16
+
+
+def fixed_code_widths(count: int, max_size: int, base_size: int = 256):
+    if not 256 <= base_size <= max_size <= 1 << FIXED_MAX_WIDTH:
+        raise ValueError(f"Rozmiar słownika poza zakresem kodów {FIXED_MIN_WIDTH}..{FIXED_MAX_WIDTH} bitowych")
+
+    start = 0
+    width = max(FIXED_MIN_WIDTH, (base_size - 1).bit_length())
+    while start < count:
+        end = count if 1 << width >= max_size else min(count, (1 << width) - base_size + 1)
+        yield start, end, width
+        start = end
+        width += 1
+
+
+def encode_fixed_width(indices: list[int], max_size: int = 1 << FIXED_MAX_WIDTH, base_size: int = 256) -> bytes:
+    writer = BitWriter()
+    write_elias_omega(writer, len(indices) + 1)
+    for start, end, width in fixed_code_widths(len(indices), max_size, base_size):
+        group = indices[start:end]
+        if max(group) >> width:
+            raise ValueError(f"Kod LZW nie mieści się w {width} bitach (słownik większy niż max_size?)")
+        for index in group:
+            writer.write(index, width)
+    return writer.getvalue()
+
+
+def decode_fixed_width(data: bytes, max_size: int = 1 << FIXED_MAX_WIDTH, base_size: int = 256) -> array:
+    reader = BitReader(data)
+    try:
+        count = read_elias_omega(reader) - 1
+    except ValueError:
+        return array('I')
+
+    indices = array('I')
+    for start, end, width in fixed_code_widths(count, max_size, base_size):
+        indices.extend(reader.read(width) for _ in range(end - start))
+    return indices
 
 
+# Wektorowe kodowanie całych tablic liczb (NumPy). Daje dokładnie te same bity
+# co encode_with_*, ale bez pętli w Pythonie po elementach.
+
+# Granice dobrane tak, żeby każdy kod mieścił się w 64 bitach (pack_codes);
+# kod omega liczby z [2**52, 2**53) ma już 65 bitów.
+BATCH_LIMITS = {
+    "gamma": 1 << 32,
+    "delta": 1 << 53,
+    "omega": 1 << 52,
+    "fibonacci": FIBS[63],
+}
+FIBS_ARRAY = np.array(FIBS[:93], dtype=np.uint64)
+PACK_BATCH = 1 << 18
+
+
+def bit_lengths(n: np.ndarray) -> np.ndarray:
+    # dokładne dla n < 2**53
+    return np.frexp(n.astype(np.float64))[1].astype(np.uint64)
+
+
+def batch_codes(n: np.ndarray, method: str) -> tuple[np.ndarray, np.ndarray]:
+    # zwraca (wartości kodów, długości kodów) dla liczb n >= 1
+    n = np.asarray(n, dtype=np.uint64)
+    if method not in BATCH_LIMITS:
+        raise ValueError(f"Nieznana metoda: {method}")
+    if n.size and (n.min() < 1 or n.max() >= BATCH_LIMITS[method]):
+        raise ValueError(f"Liczby poza zakresem kodowania wektorowego ({method})")
+
+    one = np.uint64(1)
+    if method == "gamma":
+        return n.copy(), 2 * bit_lengths(n) - one
+
+    if method == "delta":
+        L = bit_lengths(n)
+        width = 2 * bit_lengths(L) - one + L - one
+        return (L << (L - one)) | (n - (one << (L - one))), width
+
+    if method == "omega":
+        codes = np.zeros_like(n)
+        widths = np.ones_like(n)
+        current = n.copy()
+        active = np.flatnonzero(current > one)
+        while active.size:
+            group = current[active]
+            L = bit_lengths(group)
+            codes[active] |= group << widths[active]
+            widths[active] += L
+            current[active] = L - one
+            active = active[current[active] > one]
+        return codes, widths
+
+    count = np.searchsorted(FIBS_ARRAY, n, side='right').astype(np.int64)
+    codes = np.ones_like(n)
+    remainder = n.copy()
+    for i in range(int(count.max(initial=0)) - 1, -1, -1):
+        # zachłanny rozkład Zeckendorfa: reszta zawsze jest mniejsza od FIBS[count]
+        take = remainder >= FIBS_ARRAY[i]
+        codes |= take.astype(np.uint64) << np.maximum(count - i, 0).astype(np.uint64)
+        remainder -= FIBS_ARRAY[i] * take
+    return codes, count.astype(np.uint64) + one
+
+
+def pack_codes(codes: np.ndarray, widths: np.ndarray) -> bytes:
+    # każdy kod rozwijany jest do 64 bitów, z których zostaje ostatnie `width`;
+    # bity niepełnego bajtu przechodzą do następnej paczki
+    columns = np.arange(64, dtype=np.uint64)
+    out = bytearray()
+    carry = np.zeros(0, dtype=np.uint8)
+    for start in range(0, len(codes), PACK_BATCH):
+        batch = codes[start:start + PACK_BATCH].astype('>u8')
+        bits = np.unpackbits(batch.view(np.uint8)).reshape(-1, 64)
+        keep = columns >= (np.uint64(64) - widths[start:start + PACK_BATCH])[:, None]
+        bits = np.concatenate((carry, bits[keep]))
+
+        full = len(bits) // 8 * 8
+        out += np.packbits(bits[:full]).tobytes()
+        carry = bits[full:]
+    out += np.packbits(carry).tobytes()
+    return bytes(out)
+
+
+def encode_array(indices, method: str) -> bytes:
+    # indices: array('I'), tablica NumPy albo lista
+    indices = np.asarray(indices)
+    n = np.empty(len(indices) + 1, dtype=np.uint64)
+    n[0] = len(indices) + 1
+    n[1:] = indices
+    n[1:] += np.uint64(1)
+    return pack_codes(*batch_codes(n, method))
+
+
+def encoded_sizes(indices) -> dict[str, int]:
+    # Dokładne długości wyników encode_array dla każdej metody, bez kodowania.
+    # Długość kodu gamma, delta i omega zależy tylko od liczby bitów wartości,
+    # więc wystarczy histogram długości; dla Fibonacciego liczba cyfr Zeckendorfa.
+    indices = np.asarray(indices)
+    n = np.empty(len(indices) + 1, dtype=np.uint64)
+    n[0] = len(indices) + 1
+    n[1:] = indices
+    n[1:] += np.uint64(1)
+
+    largest = int(n.max())
+    histogram = np.bincount(bit_lengths(n).astype(np.int64))
+    sizes = {}
+    for method, encode in (("omega", elias_omega_encode), ("gamma", elias_gamma_encode), ("delta", elias_delta_encode)):
+        if largest < BATCH_LIMITS[method]:
+            bits = sum(int(count) * len(encode(1 << (L - 1))) for L, count in enumerate(histogram) if count)
+            sizes[method] = (bits + 7) // 8
+    if largest < BATCH_LIMITS["fibonacci"]:
+        digits = int(np.searchsorted(FIBS_ARRAY, n, side='right').sum())
+        sizes["fibonacci"] = (digits + len(n) + 7) // 8
+    return sizes
+
+
+def choose_method(indices) -> str:
+    sizes = encoded_sizes(indices)
+    return min(sizes, key=sizes.get)
 
@@ -206,7 +206,7 @@ def calculate_jpeg_7(image: np.ndarray) -> tuple[float, float, float, float]:
     # estimated X = {min(A,B) if C >= max(A,B)
     #                max(A,B) if C <= min(A,B)
     #                A + B - C indziej}
-def calculate_jpeg_new(image: np.ndarray) -> tuple[float, float, float, float]:
+def med_residual(image: np.ndarray) -> np.ndarray:
     X = image.astype(np.int16) 
 
     A = np.zeros_like(X) 
@@ -217,19 +217,14 @@ def calculate_jpeg_new(image: np.ndarray) -> tuple[float, float, float, float]:
     B[1:, :, :] = X[:-1, :, :]
     C[1:, 1:, :] = X[:-1, :-1, :]
 
-    E = np.zeros_like(X)
-
-    for i in range(X.shape[0]):
-        for j in range(X.shape[1]):
-            for k in range(X.shape[2]):
-                if C[i,j,k] >= max(A[i,j,k], B[i,j,k]):
-                    predicted = min(A[i,j,k], B[i,j,k])
-                elif C[i,j,k] <= min(A[i,j,k], B[i,j,k]):
-                    predicted = max(A[i,j,k], B[i,j,k])
-                else:
-                    predicted = A[i,j,k] + B[i,j,k] - C[i,j,k]
-                
-                E[i,j,k] = (X[i,j,k] - predicted) % 256
+    low = np.minimum(A, B)
+    high = np.maximum(A, B)
+    predicted = np.where(C >= high, low, np.where(C <= low, high, A + B - C))
+
+    return (X - predicted) % 256
+
+def calculate_jpeg_new(image: np.ndarray) -> tuple[float, float, float, float]:
+    E = med_residual(image)
 
     entropy_r = calculate_entropy(E[:, :, 0])
     entropy_g = calculate_entropy(E[:, :, 1])
@@ -0,0 +1,56 @@
+import numpy as np
+import pytest
+
+import main
+
+
+def jpeg_new_loop(image):
+    # Pierwotna wersja predyktora z potrójną pętlą, jako wzorzec dla wersji wektorowej
+    X = image.astype(np.int16)
+
+    A = np.zeros_like(X)
+    B = np.zeros_like(X)
+    C = np.zeros_like(X)
+
+    A[:, 1:, :] = X[:, :-1, :]
+    B[1:, :, :] = X[:-1, :, :]
+    C[1:, 1:, :] = X[:-1, :-1, :]
+
+    E = np.zeros_like(X)
+    for i in range(X.shape[0]):
+        for j in range(X.shape[1]):
+            for k in range(X.shape[2]):
+                if C[i,j,k] >= max(A[i,j,k], B[i,j,k]):
+                    predicted = min(A[i,j,k], B[i,j,k])
+                elif C[i,j,k] <= min(A[i,j,k], B[i,j,k]):
+                    predicted = max(A[i,j,k], B[i,j,k])
+                else:
+                    predicted = A[i,j,k] + B[i,j,k] - C[i,j,k]
+                E[i,j,k] = (X[i,j,k] - predicted) % 256
+    return E
+
+
+def gradient(height, width):
+    rows = np.arange(height)[:, None, None]
+    cols = np.arange(width)[None, :, None]
+    channels = np.arange(3)[None, None, :]
+    return ((rows * 7 + cols * 3 + channels * 50) % 256).astype(np.uint8)
+
+
+IMAGES = {
+    "random": np.random.default_rng(0).integers(0, 256, size=(23, 31, 3), dtype=np.uint8),
+    "flat": np.full((16, 16, 3), 137, dtype=np.uint8),
+    "gradient": gradient(20, 40),
+    "1x1": np.array([[[255, 0, 128]]], dtype=np.uint8),
+}
+
+
+@pytest.mark.parametrize("name", IMAGES)
+def test_med_residual_matches_loop(name):
+    image = IMAGES[name]
+    expected = jpeg_new_loop(image)
+    E = main.med_residual(image)
+
+    assert E.dtype == expected.dtype
+    assert E.shape == expected.shape
+    np.testing.assert_array_equal(E, expected)